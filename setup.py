@@ -26,10 +26,11 @@ INSTALL_REQUIRES=[
 ]
 
 EXTRAS_REQUIRE={
-    'optional': ['holoviews>=1.14.8', 'panel', 'pvlib>=0.9.0', 'openpyxl', ],
+    'optional': ['holoviews>=1.14.8', 'panel', 'pvlib>=0.9.0', 'openpyxl', 'pyarrow', 'datashader', ],
 }
 EXTRAS_REQUIRE['test'] = EXTRAS_REQUIRE['optional'] + [
     'coveralls',
+    'datashader',
     'pytest',
     'pytest-cov',
     'pytest-mock',
@@ -2,6 +2,7 @@ from captest import (
     capdata,
     util,
     prtest,
+    regression,
     columngroups,
     io,
 )
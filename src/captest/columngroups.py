@@ -1,17 +1,220 @@
 import collections
+import copy
+import re
+
+
+class _GroupList(list):
+    """
+    List of the columns of a group that tells its ColumnGroups when it changes.
+
+    Changing the list in place, e.g. with append, clears the reverse index of
+    the ColumnGroups, which is rebuilt the next time it is used.
+    """
+
+    def __init__(self, columns, owner):  # noqa: D107
+        super().__init__(columns)
+        self._owner = owner
+
+    def _changed(self):
+        self._owner._column_index = None
+
+    def __reduce_ex__(self, protocol):
+        return (list, (list(self), ))
+
+
+def _notify(method_name):
+    method = getattr(list, method_name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+    wrapper.__name__ = method_name
+    return wrapper
+
+
+for _method_name in [
+    'append', 'extend', 'insert', 'remove', 'pop', 'clear', '__setitem__',
+    '__delitem__', '__iadd__', '__imul__',
+]:
+    setattr(_GroupList, _method_name, _notify(_method_name))
+
 
 class ColumnGroups(collections.UserDict):
+    """
+    Dictionary of group ids and the lists of column names in each group.
+
+    Keeps a reverse index from each column name to the ids of the groups
+    containing it, which is used by `groups_of`, `drop_columns`,
+    `rename_columns`, and `resolve` to avoid searching the list of every group.
+    The lists of columns are stored as copies of the assigned lists.
+
+    Group ids that are strings are also set as attributes, unless they would
+    replace an attribute or method of the class, e.g. 'data' or 'resolve'.
+    Those groups and groups with ids that are not strings are only available
+    by indexing.
+    """
+
+    _reserved_attrs = {'data', '_column_index'}
+
+    def __init__(self, *args, **kwargs):  # noqa: D107
+        self._column_index = None
+        super().__init__(*args, **kwargs)
+
     def __setitem__(self, key, value):
         # key = (key.replace('-', '_')
         # )
-        setattr(self, key, value)
+        if not (isinstance(value, _GroupList) and value._owner is self):
+            value = _GroupList(value, self)
+        if self._column_index is not None:
+            if key in self.data:
+                self._unindex(key, self.data[key])
+            self._index(key, value)
+        if self._is_attr_key(key):
+            setattr(self, key, value)
         super().__setitem__(key, value)
 
+    def __delitem__(self, key):
+        if self._column_index is not None:
+            self._unindex(key, self.data[key])
+        super().__delitem__(key)
+        if self._is_attr_key(key) and key in self.__dict__:
+            delattr(self, key)
+
+    def _is_attr_key(self, key):
+        """Check if group id `key` can be set as an attribute."""
+        return (
+            isinstance(key, str)
+            and key not in self._reserved_attrs
+            and not hasattr(type(self), key)
+        )
+
+    def __copy__(self):
+        return self.__class__(self.data)
+
+    def __reduce__(self):
+        return (self.__class__, ({key: list(value) for key, value in self.items()}, ))
+
+    def __deepcopy__(self, memo):
+        return self.__class__(copy.deepcopy(
+            {key: list(value) for key, value in self.data.items()}, memo
+        ))
+
+    def _index(self, key, columns):
+        for col in columns:
+            groups = self._column_index.setdefault(col, [])
+            if key not in groups:
+                groups.append(key)
+
+    def _unindex(self, key, columns):
+        for col in columns:
+            groups = self._column_index.get(col, [])
+            if key in groups:
+                groups.remove(key)
+            if len(groups) == 0:
+                self._column_index.pop(col, None)
+
+    @property
+    def column_index(self):
+        """Dictionary of each column name and the ids of the groups with it."""
+        if self._column_index is None:
+            self._column_index = {}
+            for key, columns in self.data.items():
+                self._index(key, columns)
+        return self._column_index
+
+    def groups_of(self, column):
+        """
+        Return the ids of the groups containing `column`.
+
+        Parameters
+        ----------
+        column : str
+            Column name.
+
+        Returns
+        -------
+        list of str
+        """
+        return list(self.column_index.get(column, []))
+
+    def drop_columns(self, columns):
+        """
+        Remove columns from every group containing them.
+
+        Groups are kept when all their columns are removed.
+
+        Parameters
+        ----------
+        columns : list of str
+            Column names.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        columns = set(columns)
+        column_index = self.column_index
+        groups = {
+            key for col in columns for key in column_index.get(col, [])
+        }
+        for key in groups:
+            group = self.data[key]
+            list.__setitem__(
+                group, slice(None), [col for col in group if col not in columns]
+            )
+        for col in columns:
+            column_index.pop(col, None)
+
+    def rename_columns(self, mapping):
+        """
+        Rename columns in every group containing them.
+
+        Parameters
+        ----------
+        mapping : dict
+            Dictionary of the current and new column names.
+        """
+        column_index = self.column_index
+        groups = {
+            key for col in mapping for key in column_index.get(col, [])
+        }
+        for key in groups:
+            group = self.data[key]
+            list.__setitem__(
+                group, slice(None), [mapping.get(col, col) for col in group]
+            )
+        self._column_index = None
+
+    def resolve(self, labels, columns=None):
+        """
+        Return the column names for a list of group ids and column names.
+
+        Parameters
+        ----------
+        labels : list of str
+            Group ids and column names. Group ids are replaced by the columns of
+            the group.
+        columns : Index or set, default None
+            Column names that may be in `labels`. Labels that are not a group id
+            or in `columns` are skipped. By default, labels that are not a group
+            id are kept as column names.
+
+        Returns
+        -------
+        list of str
+        """
+        resolved = []
+        for label in labels:
+            if label in self.data:
+                resolved.extend(self.data[label])
+            elif columns is None or label in columns:
+                resolved.append(label)
+        return resolved
+
     def __repr__(self):
         """Print `column_groups` dictionary with nice formatting."""
         output = ''
         for grp_id, col_list in self.data.items():
-            output += grp_id + ':\n'
+            output += str(grp_id) + ':\n'
             for col in col_list:
                 output += ' ' * 4 + col + '\n'
         return output
@@ -80,12 +283,78 @@ def series_type(series, type_defs):
                 return key
     return ''
 
+def type_defs_regex(type_defs):
+    """
+    Compile a regex matching the first category of `type_defs` found in a name.
+
+    The regex has one branch for each category, in the order of `type_defs`,
+    made of a lookahead for any of the search strings of the category. The
+    branches are tried in order at the start of the name, so the first category
+    with a search string found anywhere in the name matches, like
+    `series_type`. A category without search strings never matches. Each branch contains one empty capture group, so the number
+    of the last matched group is the position of the category in `type_defs`.
+
+    Parameters
+    ----------
+    type_defs : dictionary
+        Dictionary with the following structure.  See type_defs
+        {'category abbreviation': [category search strings]}
+
+    Returns
+    -------
+    compiled regex
+        Match lowercase names.
+    """
+    branches = []
+    for search_strings in type_defs.values():
+        if len(search_strings) == 0:
+            # keeps the group numbering, but never matches, like series_type
+            branches.append('(?!)()')
+            continue
+        alternation = '|'.join(re.escape(s.lower()) for s in search_strings)
+        branches.append('(?=.*(?:{}))()'.format(alternation))
+    if len(branches) == 0:
+        return re.compile('(?!)')
+    return re.compile('|'.join(branches), re.DOTALL)
+
+
+def column_types(columns, type_defs):
+    """
+    Assign each column name to a category of `type_defs`.
+
+    Returns the same categories as `series_type` from the column names alone
+    using a single compiled regex for `type_defs`.
+
+    Parameters
+    ----------
+    columns : list or Index
+        Column names.
+    type_defs : dictionary
+        Dictionary with the following structure.  See type_defs
+        {'category abbreviation': [category search strings]}
+
+    Returns
+    -------
+    list of str
+        The category of each column or an empty string if the column does not
+        match any category.
+    """
+    keys = list(type_defs.keys())
+    regex = type_defs_regex(type_defs)
+    types = []
+    for name in columns:
+        match = regex.match(str(name).lower())
+        types.append('' if match is None else keys[match.lastindex - 1])
+    return types
+
+
 def group_columns(data):
     """
     Create a dict of raw column names paired to categorical column names.
 
     Uses multiple type_def formatted dictionaries to determine the type,
-    sub-type, and equipment type for data series of a dataframe.  The
+    sub-type, and equipment type for data series of a dataframe. Only the
+    column names are read, see `column_types`.  The
     determined types are concatenated to a string used as a dictionary key
     with a list of one or more original column names as the paired value.
 
@@ -104,27 +373,17 @@ def group_columns(data):
         Consider refactoring to have a list of type_def dictionaries as an
         input and loop over each dict in the list.
     """
-    col_types = data.apply(series_type, args=(type_defs,)).tolist()
-    sub_types = data.apply(series_type, args=(sub_type_defs,)).tolist()
-    irr_types = data.apply(series_type, args=(irr_sensors_defs,)).tolist()
+    columns = data.columns.tolist()
+    col_types = column_types(columns, type_defs)
+    sub_types = column_types(columns, sub_type_defs)
+    irr_types = column_types(columns, irr_sensors_defs)
 
     col_indices = []
     for typ, sub_typ, irr_typ in zip(col_types, sub_types, irr_types):
         col_indices.append('_'.join([typ, sub_typ, irr_typ]))
 
-    names = []
-    for new_name, old_name in zip(col_indices, data.columns.tolist()):
-        names.append((new_name, old_name))
-    names.sort()
-    orig_names_sorted = [name_pair[1] for name_pair in names]
-
     trans = {}
-    col_indices.sort()
-    cols = list(set(col_indices))
-    cols.sort()
-    for name in set(cols):
-        start = col_indices.index(name)
-        count = col_indices.count(name)
-        trans[name] = orig_names_sorted[start:start + count]
+    for new_name, old_name in sorted(zip(col_indices, columns)):
+        trans.setdefault(new_name, []).append(old_name)
 
     return ColumnGroups(trans)
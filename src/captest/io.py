@@ -1,6 +1,9 @@
 # this file is formatted with black
+import concurrent.futures
 import dateutil
-import datetime
+import hashlib
+import json
+from io import StringIO
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional
@@ -141,19 +144,132 @@ def load_pvsyst(
     return cd
 
 
-def file_reader(path, **kwargs):
+ENCODINGS = ["utf-8", "latin1", "iso-8859-1", "cp1252"]
+
+
+def _read_prefix(path, sniff_bytes):
+    """Read whole lines from the start of a file up to `sniff_bytes` bytes.
+
+    Returns
+    -------
+    tuple
+        The bytes read and a boolean indicating if the whole file was read.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(sniff_bytes)
+        at_eof = f.read(1) == b""
+    if not at_eof:
+        # a newline byte never occurs within a multibyte character for the
+        # supported encodings, so this also avoids splitting a character
+        prefix = prefix[: prefix.rfind(b"\n") + 1]
+    return prefix, at_eof
+
+
+def _read_sample(text, **kwargs):
+    """Parse the sniffed prefix of a file with pandas read_csv.
+
+    The warnings pandas issues when it cannot infer the format of the dates are
+    ignored, because the full read with the same kwargs issues them again.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Could not infer format")
+        warnings.filterwarnings("ignore", message="Parsing dates in")
+        return pd.read_csv(StringIO(text), **kwargs)
+
+
+def sniff_csv(path, sniff_bytes=2**16, **kwargs):
+    """
+    Detect the encoding, index column, and header rows of a csv file.
+
+    Only a prefix of the file, up to `sniff_bytes` bytes of whole lines, is read
+    and parsed. The prefix is extended if it does not contain enough lines to find
+    the first row of data or if it cannot be parsed, for example because it ends
+    within a quoted field containing a newline.
+
+    Parameters
+    ----------
+    path : Path
+        Path to file to sniff.
+    sniff_bytes : int, default 65536
+        Number of bytes to read from the start of the file.
+    **kwargs
+        Use to pass additional kwargs to pandas read_csv. An `encoding`, `index_col`,
+        or `header` passed will be used rather than detected.
+
+    Returns
+    -------
+    dict
+        The kwargs passed updated with the detected `encoding`, `index_col`, and
+        `header`, which can be passed to pandas read_csv to read the full file.
+    """
+    if "encoding" in kwargs:
+        encodings = [kwargs.pop("encoding")]
+    else:
+        encodings = ENCODINGS
+    while True:
+        prefix, at_eof = _read_prefix(path, sniff_bytes)
+        if len(prefix) == 0 and not at_eof:
+            sniff_bytes *= 4
+            continue
+        for encoding in encodings:
+            try:
+                text = prefix.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+            else:
+                break
+        else:
+            text = prefix.decode(encodings[-1])
+        read_kwargs = kwargs.copy()
+        try:
+            sample = _read_sample(text, **read_kwargs)
+            sample.dropna(how="all", axis=0, inplace=True)
+            if sample.index.equals(pd.Index(np.arange(len(sample.index)))):
+                read_kwargs["index_col"] = 1
+                sample = _read_sample(text, **read_kwargs)
+        except pd.errors.ParserError:
+            if at_eof:
+                raise
+            sniff_bytes *= 4
+            continue
+        if len(sample.index) == 0 and not at_eof:
+            sniff_bytes *= 4
+            continue
+        if len(sample.index) > 0 and not isinstance(sample.index[0], pd.Timestamp):
+            header_end = None
+            for i, indice in enumerate(sample.index):
+                try:
+                    dateutil.parser.parse(str(indice))
+                    header_end = i + 1
+                    break
+                except ValueError:
+                    continue
+            if header_end is None and not at_eof:
+                sniff_bytes *= 4
+                continue
+            if header_end is not None:
+                read_kwargs.setdefault("header", list(np.arange(header_end)))
+        read_kwargs["encoding"] = encoding
+        return read_kwargs
+
+
+def file_reader(path, sniff_bytes=2**16, **kwargs):
     """
     Read measured solar data from a csv file.
 
     Utilizes pandas read_csv to import measure solar data from a csv file.
-    Attempts a few different encodings, tries to determine the header end
-    by looking for a date in the first column, and concatenates column
-    headings to a single string.
+    The encoding, the index column, and the end of the header are detected by
+    `sniff_csv` from the first lines of the file, so the full file is parsed only
+    once. The header end is found by looking for a date in the first column.
+    Column headings are concatenated to a single string.
 
     Parameters
     ----------
     path : Path
         Path to file to import.
+    sniff_bytes : int, default 65536
+        Number of bytes read from the start of the file to detect the encoding,
+        index column, and header rows. See `sniff_csv`.
     **kwargs
         Use to pass additional kwargs to pandas read_csv.
 
@@ -169,12 +285,17 @@ def file_reader(path, **kwargs):
     }
     for key, value in default_kwargs.items():
         kwargs.setdefault(key, value)
-    encodings = ["utf-8", "latin1", "iso-8859-1", "cp1252"]
+    kwargs = sniff_csv(path, sniff_bytes=sniff_bytes, **kwargs)
+    # the sniffed encoding may fail after the prefix, so fall back to the others
+    sniffed_encoding = kwargs.pop('encoding')
+    encodings = [sniffed_encoding] + [
+        encoding for encoding in ENCODINGS if encoding != sniffed_encoding
+    ]
     for encoding in encodings:
-        kwargs['encoding'] = encoding
         try:
             data_file = pd.read_csv(
                 path,
+                encoding=encoding,
                 **kwargs,
             )
         except UnicodeDecodeError:
@@ -182,28 +303,6 @@ def file_reader(path, **kwargs):
         else:
             break
     data_file.dropna(how="all", axis=0, inplace=True)
-    if data_file.index.equals(pd.Index(np.arange(len(data_file.index)))):
-        kwargs['index_col'] = 1
-        data_file = pd.read_csv(
-            path,
-            **kwargs,
-        )
-    if not isinstance(data_file.index[0], pd.Timestamp):
-        for i, _indice in enumerate(data_file.index):
-            try:
-                isinstance(
-                    dateutil.parser.parse(str(data_file.index[i])), datetime.date
-                )
-                header_end = i + 1
-                break
-            except ValueError:
-                continue
-        header = list(np.arange(header_end))
-        kwargs.setdefault('header', header)
-        data_file = pd.read_csv(
-            path,
-            **kwargs,
-        )
     data_file = data_file.apply(pd.to_numeric)
     if isinstance(data_file.columns, pd.MultiIndex):
         data_file.columns = flatten_multi_index(data_file.columns)
@@ -211,6 +310,32 @@ def file_reader(path, **kwargs):
     return data_file
 
 
+def _read_and_reindex(file_reader, path, kwargs):
+    """Read a single file and reindex it.
+
+    Module level function, so it can be pickled and sent to the workers of a
+    process pool by `DataLoader.load`.
+
+    Returns
+    -------
+    tuple
+        Reindexed DataFrame, the number of intervals added to its index, and
+        the frequency string of its index.
+    """
+    data = file_reader(path, **kwargs)
+    return util.reindex_datetime(
+        data,
+        report=False,
+        add_index_col=True,
+    )
+
+
+def _most_common(values):
+    """Return the most frequently occurring value in `values`."""
+    unique_vals = np.unique(np.array(values), return_counts=True)
+    return unique_vals[0][np.argmax(unique_vals[1])]
+
+
 @dataclass
 class DataLoader:
     """
@@ -222,6 +347,8 @@ class DataLoader:
     sys: Optional[dict] = field(default=None)
     file_reader: object = file_reader
     files_to_load: Optional[list] = field(default=None)
+    failed_files: dict = field(default_factory=dict)
+    file_missing_intervals: dict = field(default_factory=dict)
 
     def __setattr__(self, key, value):
         if key == "path":
@@ -253,9 +380,13 @@ class DataLoader:
             The index frequency most common across the reindexed DataFrames.
         file_frequencies : list
             The index frequencies for each file.
+
+        The number of intervals added to each file is stored to the
+        `file_missing_intervals` attribute.
         """
         reindexed_dfs = {}
         file_frequencies = []
+        file_missing_intervals = {}
         for name, file in self.loaded_files.items():
             current_file, missing_intervals, freq_str = util.reindex_datetime(
                 file,
@@ -264,15 +395,68 @@ class DataLoader:
             )
             reindexed_dfs[name] = current_file
             file_frequencies.append(freq_str)
+            file_missing_intervals[name] = missing_intervals
 
-        unique_freq = np.unique(
-            np.array([freq for freq in file_frequencies]),
-            return_counts=True,
-        )
-        common_freq = unique_freq[0][np.argmax(unique_freq[1])]
+        self.file_missing_intervals = file_missing_intervals
+        common_freq = _most_common(file_frequencies)
 
         return reindexed_dfs, common_freq, file_frequencies
 
+    def _load_files_parallel(self, workers, executor="thread", **kwargs):
+        """Read and reindex each file in `files_to_load` in a pool of workers.
+
+        Each worker calls `file_reader` and then reindexes the file, so there is
+        no second serial pass to reindex the loaded files. The files are stored
+        to `loaded_files` in the same order as `files_to_load`, which matches the
+        result of loading the files serially.
+
+        Files that cannot be read are skipped. A warning is issued for each of
+        these files and the exceptions are stored to the `failed_files`
+        attribute, a dictionary mapping the file paths to the exception raised.
+
+        Parameters
+        ----------
+        workers : int
+            Maximum number of workers in the pool.
+        executor : str, default "thread"
+            Use "thread" for a thread pool or "process" for a process pool. The
+            `file_reader` must be picklable, e.g. a module level function, to use
+            a process pool.
+        **kwargs
+            Passed to `file_reader`.
+        """
+        if executor == "thread":
+            pool_class = concurrent.futures.ThreadPoolExecutor
+        elif executor == "process":
+            pool_class = concurrent.futures.ProcessPoolExecutor
+        else:
+            raise ValueError("executor must be 'thread' or 'process'.")
+
+        with pool_class(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_read_and_reindex, self.file_reader, file, kwargs)
+                for file in self.files_to_load
+            ]
+            loaded_files = {}
+            file_frequencies = []
+            file_missing_intervals = {}
+            for file, future in zip(self.files_to_load, futures):
+                try:
+                    data, missing_intervals, freq_str = future.result()
+                except Exception as exc:
+                    self.failed_files[file] = exc
+                    warnings.warn("Failed to load {}: {!r}".format(file, exc))
+                    continue
+                loaded_files[file.stem] = data
+                file_frequencies.append(freq_str)
+                file_missing_intervals[file.stem] = missing_intervals
+
+        self.loaded_files = loaded_files
+        self.file_frequencies = file_frequencies
+        self.file_missing_intervals = file_missing_intervals
+        if len(file_frequencies) > 0:
+            self.common_freq = _most_common(file_frequencies)
+
     def _join_files(self):
         """Combine the DataFrames of `loaded_files` into a single DataFrame.
 
@@ -297,7 +481,9 @@ class DataLoader:
         indices_match = all(
             [pair[0].equals(pair[1]) for pair in combinations(all_indices, 2)]
         )
-        if columns_match and not indices_match:
+        if len(self.loaded_files) == 1:
+            data = next(iter(self.loaded_files.values())).copy()
+        elif columns_match and not indices_match:
             data = pd.concat(self.loaded_files.values(), axis="index")
         elif columns_match and indices_match:
             warnings.warn("Some columns contain overlapping indices.")
@@ -319,7 +505,7 @@ class DataLoader:
         data = data.apply(pd.to_numeric, errors="coerce")
         return data
 
-    def load(self, extension="csv", **kwargs):
+    def load(self, extension="csv", workers=None, executor="thread", **kwargs):
         """
         Load file(s) of timeseries data from SCADA / DAS systems.
 
@@ -327,12 +513,18 @@ class DataLoader:
         to a directory of files to load all the files in the directory ending in "csv".
         Or, set `files_to_load` to a list of specific files to load.
 
+        The files that are loaded are stored to the `ingested_files` attribute, so
+        files added to the directory later can be loaded with `load_new_files`.
+
         Multiple files will be joined together and may include files with different
         column headings. When multiple files with matching column headings are loaded,
         the individual files will be reindexed and then joined.
 
         Missing time intervals within the individual files will be filled,
         but missing time intervals between the individual files will not be filled.
+        The number of intervals filled in each file is stored to the
+        `file_missing_intervals` attribute, a dictionary mapping the file names to
+        the number of intervals.
 
         When loading multiple files they will be stored in `loaded_files`, a dictionary,
         mapping the file names to a dataframe for each file.
@@ -343,6 +535,15 @@ class DataLoader:
             Change the extension to allow loading different filetypes. Must also set
             the `file_reader` attribute to a function that will read that type of file.
             Do not include a period ".".
+        workers : int, default None
+            By default files are read one at a time. Pass an integer to read and
+            reindex the files in a pool of up to `workers` threads or processes.
+            The loaded data matches the result of reading the files one at a time.
+            Files that fail to load are skipped with a warning and stored to the
+            `failed_files` attribute. Ignored when `path` is a single file.
+        executor : str, default "thread"
+            Type of pool used when `workers` is not None. Either "thread" or
+            "process". Using "process" requires a picklable `file_reader`.
         **kwargs
             Are passed through to the file_reader callable, which by default will pass
             them on to pandas.read_csv.
@@ -352,29 +553,142 @@ class DataLoader:
         None
             Resulting DataFrame of data is stored to the `data` attribute.
         """
+        self.failed_files = {}
         if self.path.is_file():
             self.data = self.file_reader(self.path, **kwargs)
+            self.ingested_files = [self.path]
         elif self.path.is_dir():
-            if self.files_to_load is not None:
-                self.loaded_files = {
-                    file.stem: self.file_reader(file, **kwargs) for file in self.files_to_load
-                }
-            else:
+            if self.files_to_load is None:
                 self.set_files_to_load(extension=extension)
+            if workers is not None:
+                self._load_files_parallel(workers, executor=executor, **kwargs)
+                if len(self.loaded_files) == 0:
+                    return warnings.warn("None of the files could be loaded.")
+            else:
                 self.loaded_files = {
-                    file.stem: self.file_reader(file, **kwargs) for file in self.files_to_load
+                    file.stem: self.file_reader(file, **kwargs)
+                    for file in self.files_to_load
                 }
-            (
-                self.loaded_files,
-                self.common_freq,
-                self.file_frequencies,
-            ) = self._reindex_loaded_files()
+                (
+                    self.loaded_files,
+                    self.common_freq,
+                    self.file_frequencies,
+                ) = self._reindex_loaded_files()
             data = self._join_files()
             data.index.name = "Timestamp"
             self.data = data
+            self.ingested_files = [
+                file for file in self.files_to_load if file not in self.failed_files
+            ]
         else:
             warnings.warn("No directory or file found at {}".format(self.path))
 
+    def load_new_files(
+        self, extension="csv", sort=True, drop_duplicates=True, **kwargs
+    ):
+        """
+        Load files added to the `path` directory since the last load.
+
+        Only files with the `extension` that are not in `ingested_files` are read.
+        The new data is sorted, deduplicated, and reindexed on its own and then
+        appended after the last row of `data`. The historical data is not re-sorted,
+        deduplicated, or reindexed.
+
+        If `reindex` was called on the existing data, the new rows are reindexed using
+        the existing `freq_str` starting one interval after the end of the existing
+        data, so that `data` keeps a continuous index. Intervals added are counted in
+        `missing_intervals`. Rows of the new files that are not on these intervals
+        are dropped with a warning.
+
+        Rows of the new files at or before the last timestamp of the existing data are
+        dropped with a warning.
+
+        Only the `data` of the DataLoader is updated. Use `CapData.load_new_files`
+        to append the new rows to a CapData object created by `load_data`.
+
+        Parameters
+        ----------
+        extension : str, default "csv"
+            Extension of the files to look for in the `path` directory.
+        sort : bool, default True
+            Sort the new data by the datetime index.
+        drop_duplicates : bool, default True
+            Drop rows of the new data where all the columns are duplicates of
+            another row of the new data.
+        **kwargs
+            Passed to `load`, e.g. `workers`, and on to `file_reader`.
+
+        Returns
+        -------
+        DataFrame or None
+            The rows appended to `data` or None if there were no new files.
+        """
+        if not self.path.is_dir():
+            return warnings.warn("New files can only be loaded from a directory.")
+        if getattr(self, "ingested_files", None) is None:
+            return warnings.warn("No files have been loaded yet, use `load` first.")
+        ingested_files = set(self.ingested_files)
+        new_files = [
+            file for file in sorted(self.path.glob("*." + extension))
+            if file not in ingested_files
+        ]
+        if len(new_files) == 0:
+            return warnings.warn("No new files found in {}".format(self.path))
+
+        new_loader = DataLoader(
+            path=self.path,
+            file_reader=self.file_reader,
+            files_to_load=new_files,
+        )
+        new_loader.load(extension=extension, **kwargs)
+        self.ingested_files.extend(getattr(new_loader, "ingested_files", []))
+        if not hasattr(new_loader, "data"):
+            return None
+        self.loaded_files.update(new_loader.loaded_files)
+        new_data = new_loader.data
+        if sort:
+            new_data = new_data.sort_index()
+        if drop_duplicates:
+            new_data = new_data.drop_duplicates()
+
+        last_timestamp = self.data.index[-1]
+        overlapping = new_data.index <= last_timestamp
+        if overlapping.any():
+            warnings.warn(
+                "{} rows of the new files at or before the end of the existing data, "
+                "{}, were not added.".format(overlapping.sum(), last_timestamp)
+            )
+            new_data = new_data[~overlapping]
+        if new_data.shape[0] == 0:
+            return None
+
+        freq_str = getattr(self, "freq_str", None)
+        if freq_str is not None:
+            new_index = pd.date_range(
+                start=last_timestamp + pd.tseries.frequencies.to_offset(freq_str),
+                end=new_data.index[-1],
+                freq=freq_str,
+            )
+            on_grid = new_data.index.isin(new_index)
+            if not on_grid.all():
+                warnings.warn(
+                    "{} rows of the new files are not on the {} intervals of the "
+                    "existing data and were not added.".format(
+                        (~on_grid).sum(), freq_str
+                    )
+                )
+                new_data = new_data[on_grid]
+            self.missing_intervals += new_index.shape[0] - new_data.shape[0]
+            new_data = new_data.reindex(index=new_index)
+            if "index" in self.data.columns:
+                new_data["index"] = new_index.strftime("%m/%d/%Y %H %M")
+        new_data.index.name = self.data.index.name
+
+        self.data = pd.concat([self.data, new_data], axis="index")
+        if freq_str is not None:
+            self.data.index.freq = freq_str
+        return new_data
+
     def sort_data(self):
         self.data.sort_index(inplace=True)
 
@@ -388,6 +702,94 @@ class DataLoader:
         )
 
 
+def _callable_name(obj):
+    """Return an identifier for a function to use in a cache key."""
+    if callable(obj):
+        return getattr(obj, "__module__", "") + "." + getattr(
+            obj, "__qualname__", repr(obj)
+        )
+    return obj
+
+
+def _file_fingerprint(path):
+    """Return the resolved path, size, and modification time of a file."""
+    stat = Path(path).stat()
+    return [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+
+
+def load_data_cache_key(path, extension="csv", files_to_load=None, **loader_kwargs):
+    """
+    Create a key identifying the result of `load_data` for a set of files.
+
+    The key is a hash of the path, size, and modification time of each file that
+    would be loaded, the arguments used to load them, and the versions of captest
+    and pandas. Changing, adding, or removing a file, changing an argument, or
+    upgrading captest or pandas results in a different key.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to a single file or a directory of files.
+    extension : str, default "csv"
+        Extension of the files loaded from a directory.
+    files_to_load : list, default None
+        Specific files to load from the directory.
+    **loader_kwargs
+        Other arguments that change the loaded data, like the `load_data`
+        arguments and the kwargs passed to the file reader.
+
+    Returns
+    -------
+    str
+    """
+    path = Path(path)
+    if files_to_load is None:
+        if path.is_dir():
+            files_to_load = sorted(path.glob("*." + extension))
+        else:
+            files_to_load = [path]
+    # imported here, because captest imports this module before setting its version
+    from captest import __version__
+
+    key_data = {
+        "versions": {"captest": __version__, "pandas": pd.__version__},
+        "files": [_file_fingerprint(file) for file in files_to_load],
+        "kwargs": {
+            key: _callable_name(val) for key, val in loader_kwargs.items()
+        },
+    }
+    group_columns = loader_kwargs.get("group_columns")
+    if isinstance(group_columns, str):
+        key_data["group_columns_file"] = _file_fingerprint(group_columns)
+    key_str = json.dumps(key_data, sort_keys=True, default=repr)
+    return hashlib.sha256(key_str.encode()).hexdigest()
+
+
+def _read_load_data_cache(cache_dir, key):
+    """Read cached data and metadata, returns None if not in the cache."""
+    meta_path = Path(cache_dir) / (key + ".json")
+    if not meta_path.exists():
+        return None
+    data = util.read_parquet_cache(Path(cache_dir) / (key + ".parquet"))
+    if data is None:
+        return None
+    meta = util.read_json(meta_path)
+    if meta.get("freq_str") is not None:
+        data.index.freq = meta["freq_str"]
+    return data, meta
+
+
+def _write_load_data_cache(cache_dir, key, data, meta):
+    """Write loaded data as parquet and metadata as json to the cache."""
+    cache_dir = Path(cache_dir)
+    if not util.write_parquet_cache(
+        cache_dir / (key + ".parquet"), data, description="loaded data"
+    ):
+        return
+    with open(cache_dir / (key + ".json"), "w") as f:
+        json.dump(meta, f)
+
+
 def load_data(
     path,
     group_columns=cg.group_columns,
@@ -398,6 +800,8 @@ def load_data(
     reindex=True,
     site=None,
     column_groups_template=False,
+    cache_dir=None,
+    filter_mode="copy",
     **kwargs,
 ):
     """
@@ -445,10 +849,23 @@ def load_data(
         added to the data and the column_groups attribute is updated to include these
         two irradiance columns. The site data dictionary should be
         {sys: {system data}, loc: {location data}}. See the capdata.csky documentation
-        for the format of the system data and location data.
+        for the format of the system data and location data. Include an optional
+        'coarse_freq' key, e.g. {..., 'coarse_freq': '5min'}, to model the clear sky
+        irradiance at a coarser frequency and interpolate it onto the data, see the
+        `coarse_freq` argument of `capdata.csky`.
     column_groups_template : bool, default False
         If True, will call `CapData.data_columns_to_excel` to save a file to use to
         manually create column groupings at `path`.
+    cache_dir : str or Path, default None
+        Directory to cache the loaded data in. The joined, sorted, deduplicated, and
+        reindexed data is saved as a parquet file along with the column groups and
+        the index frequency. The next call with the same files, file sizes,
+        modification times, and arguments reads the cached data instead of loading
+        the files. If `site` is passed, the clear sky irradiance is also cached, see
+        `capdata.csky`. Requires the pyarrow or fastparquet package.
+    filter_mode : str, default "copy"
+        Passed to `CapData`. Use "mask" to store the filtered data as a boolean
+        mask over the rows of `data` rather than a second copy of the data.
     **kwargs
         Passed to `DataLoader.load`, which passes them to the `file_reader` function.
         The default `file_reader` function passes them to pandas.read_csv.
@@ -457,21 +874,60 @@ def load_data(
         path=path,
         file_reader=file_reader,
     )
-    dl.load(**kwargs)
-
-    if sort:
-        dl.sort_data()
-    if drop_duplicates:
-        dl.drop_duplicate_rows()
-    if reindex:
-        dl.reindex()
 
-    cd = CapData(name)
+    cached = None
+    if cache_dir is not None:
+        if util.parquet_spec is None:
+            warnings.warn(
+                "Caching loaded data requires the pyarrow or fastparquet package."
+            )
+            cache_dir = None
+        else:
+            loader_kwargs = {
+                key: val for key, val in kwargs.items()
+                if key not in ["workers", "executor"]
+            }
+            cache_key = load_data_cache_key(
+                path,
+                group_columns=group_columns,
+                file_reader=file_reader,
+                sort=sort,
+                drop_duplicates=drop_duplicates,
+                reindex=reindex,
+                **loader_kwargs,
+            )
+            cached = _read_load_data_cache(cache_dir, cache_key)
+
+    if cached is not None:
+        dl.data, meta = cached
+        if reindex:
+            dl.missing_intervals = meta["missing_intervals"]
+            dl.freq_str = meta["freq_str"]
+        if dl.path.is_dir():
+            dl.ingested_files = sorted(
+                dl.path.glob("*." + kwargs.get("extension", "csv"))
+            )
+        else:
+            dl.ingested_files = [dl.path]
+        dl.loaded_files = {}
+    else:
+        dl.load(**kwargs)
+
+        if sort:
+            dl.sort_data()
+        if drop_duplicates:
+            dl.drop_duplicate_rows()
+        if reindex:
+            dl.reindex()
+
+    cd = CapData(name, filter_mode=filter_mode)
     cd.data = dl.data.copy()
-    cd.data_filtered = cd.data.copy()
+    cd.reset_filter()
     cd.data_loader = dl
     # group columns
-    if callable(group_columns):
+    if cached is not None:
+        cd.column_groups = cg.ColumnGroups(meta["column_groups"])
+    elif callable(group_columns):
         cd.column_groups = group_columns(cd.data)
     elif isinstance(group_columns, str):
         p = Path(group_columns)
@@ -481,9 +937,21 @@ def load_data(
             cd.column_groups = cg.ColumnGroups(util.read_yaml(group_columns))
         elif (p.suffix == '.xlsx') or (p.suffix == '.xls'):
             cd.column_groups = cg.ColumnGroups(load_excel_column_groups(group_columns))
+    if cache_dir is not None and cached is None:
+        meta = {"column_groups": dict(cd.column_groups)}
+        if reindex:
+            meta["missing_intervals"] = int(dl.missing_intervals)
+            meta["freq_str"] = dl.freq_str
+        _write_load_data_cache(cache_dir, cache_key, dl.data, meta)
     if site is not None:
-        cd.data = csky(cd.data, loc=site['loc'], sys=site['sys'])
-        cd.data_filtered = cd.data.copy()
+        dl.loc = site["loc"]
+        dl.sys = site["sys"]
+        cd.csky_kwargs = {
+            "cache_dir": cache_dir,
+            "coarse_freq": site.get("coarse_freq"),
+        }
+        cd.data = csky(cd.data, loc=site["loc"], sys=site["sys"], **cd.csky_kwargs)
+        cd.reset_filter()
         cd.column_groups['irr-poa-clear_sky'] = ['poa_mod_csky']
         cd.column_groups['irr-ghi-clear_sky'] = ['ghi_mod_csky']
     cd.trans_keys = list(cd.column_groups.keys())
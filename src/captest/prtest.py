@@ -3,9 +3,11 @@ import warnings
 import numpy as np
 import pandas as pd
 import param
-from scipy import stats
 
 from captest import capdata
+from captest import util
+
+stats = util.lazy_import('scipy.stats', lazy=util.HEADLESS)
 
 
 emp_heat_coeff = {
@@ -250,7 +252,7 @@ def perf_ratio(
         return
 
     timestep = get_common_timestep(poa, units="h", string_output=False)
-    timestep_str = get_common_timestep(poa, units="h", string_output=True)
+    timestep_str = str(timestep) + " hours"
 
     expected_dc = (
         availability
@@ -340,7 +342,7 @@ def perf_ratio_temp_corr_nrel(
     -------
     """
     timestep = get_common_timestep(poa, units="h", string_output=False)
-    timestep_str = get_common_timestep(poa, units="h", string_output=True)
+    timestep_str = str(timestep) + " hours"
 
     temp_bom = back_of_module_temp(poa, temp_amb, wind_speed, module_type, racking)
     temp_cell = cell_temp(temp_bom, poa, module_type, racking)
@@ -376,6 +378,367 @@ def perf_ratio_temp_corr_nrel(
     return results
 
 
+def _degradation_years(periods, year, start_date):
+    """Return the year of operation of each period."""
+    if start_date is None:
+        return np.full(len(periods), year, dtype=float)
+    start = pd.Timestamp(start_date)
+    period_starts = periods.start_time
+    before_anniversary = (period_starts.month < start.month) | (
+        (period_starts.month == start.month) & (period_starts.day < start.day)
+    )
+    full_years = period_starts.year - start.year - before_anniversary
+    return np.asarray(full_years, dtype=float) + 1
+
+
+def perf_ratio_by_period(
+    ac_energy,
+    dc_nameplate,
+    poa,
+    freq="D",
+    unit_adj=1,
+    degradation=0,
+    year=1,
+    start_date=None,
+    availability=1,
+    power_temp_coeff=None,
+    temp_amb=None,
+    wind_speed=None,
+    base_temp=25,
+    module_type="glass_cell_poly",
+    racking="open_rack",
+):
+    """Calculate the performance ratio of each period, e.g. each day or month.
+
+    The measured energy and expected energy of every timestep are summed by
+    period in a single groupby, so the performance ratio of years of data can be
+    reported by day, week, or month at once. The expected energy is calculated
+    like `perf_ratio` or, if `power_temp_coeff` is passed, with the temperature
+    correction of `perf_ratio_temp_corr_nrel`.
+
+    Parameters
+    ----------
+    ac_energy : Series
+        Measured energy production (Wh) from system meter.
+    dc_nameplate : numeric
+        Summation of nameplate ratings (W) for all installed modules of system
+        under test.
+    poa : Series
+        POA irradiance (W/m^2) for each time interval.
+    freq : str, default 'D'
+        Pandas period frequency of the periods, e.g. 'D', 'W', or 'M'.
+    unit_adj : numeric, default 1
+        Scale factor to adjust units of `ac_energy`. For exmaple pass 1000
+        to convert measured energy from kWh to Wh within PR calculation.
+    degradation : numeric, default 0
+        Apply a derate (percent, Ex: 0.5%) for degradation to the expected
+        energy (denominator) of each period.
+        NOTE: Percent is divided by 100 to convert to decimal within function.
+    year : numeric, default 1
+        Year of operation to use in degradation calculation for every period.
+        Ignored if `start_date` is passed.
+    start_date : str or Timestamp, default None
+        Start of operation. If passed, the year of operation of each period is
+        calculated from the start of the period, so the degradation increases
+        each year.
+    availability : numeric or Series, default 1
+        Apply an adjustment for plant availability to the expected energy
+        (denominator). Pass a Series with the index of `poa` to adjust each
+        timestep or a Series indexed by period to adjust each period.
+    power_temp_coeff : numeric, default None
+        Module power temperature coefficient as percent per degree celsius.
+        Ex. -0.36. If passed, the nameplate is corrected to the cell
+        temperature calculated from `poa`, `temp_amb`, and `wind_speed` using
+        `back_of_module_temp`, `cell_temp`, and `temp_correct_power`.
+    temp_amb : Series, default None
+        Ambient temperature (degrees C) measurements.
+    wind_speed : Series, default None
+        Measured wind speed (m/sec) corrected to measurement height of
+        10 meters.
+    base_temp : numeric, default 25
+        Base temperature (in Celsius) to correct power to.
+    module_type : str, default 'glass_cell_poly'
+        Any of glass_cell_poly, glass_cell_glass, or 'poly_tf_steel'.
+    racking: str, default 'open_rack'
+        Any of 'open_rack', 'close_roof_mount', or 'insulated_back'
+
+    Returns
+    -------
+    DataFrame
+        Indexed by period with the columns 'ac_energy', 'expected_dc', 'pr',
+        'availability', 'year', and 'degradation_factor'. 'ac_energy' is
+        adjusted by `unit_adj` and 'availability' is the availability of each
+        period, weighted by the expected energy when it is passed by timestep.
+    """
+    timestep_avail = (
+        isinstance(availability, pd.Series) and availability.index.equals(poa.index)
+    )
+    if not perf_ratio_inputs_ok(
+        ac_energy,
+        dc_nameplate,
+        poa,
+        availability=availability if timestep_avail else 1,
+    ):
+        return
+
+    timestep = get_common_timestep(poa, units="h", string_output=False)
+    sums = _pr_period_sums(
+        ac_energy,
+        dc_nameplate,
+        poa,
+        timestep,
+        freq,
+        unit_adj=unit_adj,
+        availability=availability if timestep_avail else 1,
+        power_temp_coeff=power_temp_coeff,
+        temp_amb=temp_amb,
+        wind_speed=wind_speed,
+        base_temp=base_temp,
+        module_type=module_type,
+        racking=racking,
+    )
+    return _pr_period_table(
+        sums,
+        availability=None if timestep_avail else availability,
+        degradation=degradation,
+        year=year,
+        start_date=start_date,
+    )
+
+
+def _pr_period_sums(
+    ac_energy,
+    dc_nameplate,
+    poa,
+    timestep,
+    freq,
+    unit_adj=1,
+    availability=1,
+    power_temp_coeff=None,
+    temp_amb=None,
+    wind_speed=None,
+    base_temp=25,
+    module_type="glass_cell_poly",
+    racking="open_rack",
+):
+    """Sum the measured, expected, and available energy of each period."""
+    if power_temp_coeff is not None:
+        temp_bom = back_of_module_temp(poa, temp_amb, wind_speed, module_type, racking)
+        temp_cell = cell_temp(temp_bom, poa, module_type, racking)
+        dc_nameplate = temp_correct_power(
+            dc_nameplate, power_temp_coeff, temp_cell, base_temp=base_temp
+        )
+    expected_dc = dc_nameplate * poa / 1000 * timestep
+    sums = pd.DataFrame({
+        "ac_energy": ac_energy * unit_adj,
+        "expected_dc": expected_dc,
+        "available_dc": expected_dc * availability,
+    })
+    return sums.groupby(poa.index.to_period(freq)).sum()
+
+
+def _pr_period_table(sums, availability=None, degradation=0, year=1, start_date=None):
+    """Apply availability and degradation to the sums of each period.
+
+    If `availability` is None, the availability of each period is the ratio of
+    the available and expected energy of the period.
+    """
+    sums = sums.copy()
+    available_dc = sums.pop("available_dc")
+    if availability is None:
+        period_avail = available_dc / sums["expected_dc"]
+    elif isinstance(availability, pd.Series):
+        period_avail = availability.reindex(sums.index)
+    else:
+        period_avail = pd.Series(availability, index=sums.index, dtype=float)
+
+    years = _degradation_years(sums.index, year, start_date)
+    degradation_factor = (1 - degradation / 100) ** years
+
+    sums["expected_dc"] = sums["expected_dc"] * period_avail * degradation_factor
+    sums["pr"] = sums["ac_energy"] / sums["expected_dc"]
+    sums["availability"] = period_avail
+    sums["year"] = years
+    sums["degradation_factor"] = degradation_factor
+    return sums
+
+
+class PrAccumulator(object):
+    """
+    Calculate the performance ratio of data passed in chunks.
+
+    Each call to `update` adds the measured, expected, and available energy of
+    each period of a chunk of data to running sums, so data too large to load
+    at once, like years of 1-minute data, can be read and passed a chunk at a
+    time. The results can be created at any time from the sums.
+
+    The chunks should not overlap, rows passed twice are counted twice.
+
+    Parameters
+    ----------
+    dc_nameplate : numeric
+        Summation of nameplate ratings (W) for all installed modules of system
+        under test.
+    freq : str, default 'D'
+        Pandas period frequency of the periods the sums are kept for.
+    timestep : numeric, default None
+        Timestep of the data in hours. By default it is found from the first
+        chunk with `get_common_timestep` and used for the following chunks.
+    unit_adj : numeric, default 1
+        Scale factor to adjust units of `ac_energy`.
+    degradation : numeric, default 0
+        Derate (percent) for degradation applied to the expected energy of each
+        period. See `perf_ratio_by_period`.
+    year : numeric, default 1
+        Year of operation to use in degradation calculation.
+    start_date : str or Timestamp, default None
+        Start of operation used to find the year of operation of each period.
+    power_temp_coeff : numeric, default None
+        Module power temperature coefficient as percent per degree celsius. If
+        passed, `temp_amb` and `wind_speed` must be passed to `update` and the
+        nameplate is corrected for cell temperature like
+        `perf_ratio_temp_corr_nrel`.
+    base_temp : numeric, default 25
+        Base temperature (in Celsius) to correct power to.
+    module_type : str, default 'glass_cell_poly'
+        Any of glass_cell_poly, glass_cell_glass, or 'poly_tf_steel'.
+    racking: str, default 'open_rack'
+        Any of 'open_rack', 'close_roof_mount', or 'insulated_back'
+
+    Attributes
+    ----------
+    sums : DataFrame
+        Sums of the measured, expected, and available energy of each period.
+        None until the first chunk is passed.
+    """
+
+    def __init__(
+        self,
+        dc_nameplate,
+        freq="D",
+        timestep=None,
+        unit_adj=1,
+        degradation=0,
+        year=1,
+        start_date=None,
+        power_temp_coeff=None,
+        base_temp=25,
+        module_type="glass_cell_poly",
+        racking="open_rack",
+    ):  # noqa: D107
+        self.dc_nameplate = dc_nameplate
+        self.freq = freq
+        self.timestep = timestep
+        self.unit_adj = unit_adj
+        self.degradation = degradation
+        self.year = year
+        self.start_date = start_date
+        self.power_temp_coeff = power_temp_coeff
+        self.base_temp = base_temp
+        self.module_type = module_type
+        self.racking = racking
+        self.sums = None
+
+    def update(self, ac_energy, poa, temp_amb=None, wind_speed=None, availability=1):
+        """
+        Add a chunk of data to the sums.
+
+        Parameters
+        ----------
+        ac_energy : Series
+            Measured energy production (Wh) from system meter.
+        poa : Series
+            POA irradiance (W/m^2) for each time interval of the chunk.
+        temp_amb : Series, default None
+            Ambient temperature (degrees C). Required if `power_temp_coeff` was
+            passed.
+        wind_speed : Series, default None
+            Measured wind speed (m/sec) corrected to measurement height of
+            10 meters. Required if `power_temp_coeff` was passed.
+        availability : numeric or Series, default 1
+            Availability of the plant for each timestep of the chunk.
+
+        Returns
+        -------
+        PrAccumulator
+            Returns itself.
+        """
+        if not perf_ratio_inputs_ok(
+            ac_energy, self.dc_nameplate, poa, availability=availability
+        ):
+            return self
+        if self.timestep is None:
+            self.timestep = get_common_timestep(poa, units="h", string_output=False)
+        chunk_sums = _pr_period_sums(
+            ac_energy,
+            self.dc_nameplate,
+            poa,
+            self.timestep,
+            self.freq,
+            unit_adj=self.unit_adj,
+            availability=availability,
+            power_temp_coeff=self.power_temp_coeff,
+            temp_amb=temp_amb,
+            wind_speed=wind_speed,
+            base_temp=self.base_temp,
+            module_type=self.module_type,
+            racking=self.racking,
+        )
+        if self.sums is None:
+            self.sums = chunk_sums
+        else:
+            self.sums = self.sums.add(chunk_sums, fill_value=0)
+        return self
+
+    def by_period(self):
+        """
+        Return the performance ratio of each period of the data passed so far.
+
+        Returns
+        -------
+        DataFrame
+            Same as the table returned by `perf_ratio_by_period`.
+
+        Raises
+        ------
+        ValueError
+            If no data has been added with `update`.
+        """
+        if self.sums is None:
+            raise ValueError(
+                "No data has been added to the accumulator, call update first."
+            )
+        return _pr_period_table(
+            self.sums,
+            degradation=self.degradation,
+            year=self.year,
+            start_date=self.start_date,
+        )
+
+    def results(self):
+        """
+        Return the performance ratio of all the data passed so far.
+
+        Returns
+        -------
+        PrResults
+            The `results_data` are the results of each period from `by_period`.
+
+        Raises
+        ------
+        ValueError
+            If no data has been added with `update`.
+        """
+        by_period = self.by_period()
+        pr = by_period["ac_energy"].sum() / by_period["expected_dc"].sum()
+        return PrResults(
+            timestep=(self.timestep, str(self.timestep) + " hours"),
+            pr=pr,
+            dc_nameplate=self.dc_nameplate,
+            results_data=by_period,
+        )
+
+
 class PrResults(param.Parameterized):
     """
     Results from a PR calculation.
@@ -0,0 +1,651 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from captest import util
+
+stats = util.lazy_import('scipy.stats', lazy=util.HEADLESS)
+patsy = util.lazy_import('patsy', lazy=util.HEADLESS)
+
+
+ASTM_FORMULA = 'power ~ poa + I(poa * poa) + I(poa * t_amb) + I(poa * w_vel) - 1'
+ASTM_PARAM_NAMES = ['poa', 'I(poa * poa)', 'I(poa * t_amb)', 'I(poa * w_vel)']
+ASTM_VARIABLES = ['power', 'poa', 't_amb', 'w_vel']
+
+
+def _rhs_desc(fml):
+    """Return the patsy description of the right hand side of `fml`."""
+    return patsy.ModelDesc([], patsy.ModelDesc.from_formula(fml).rhs_termlist)
+
+
+def _strip_whitespace(fml):
+    return ''.join(fml.split())
+
+
+def is_astm_formula(fml):
+    """
+    Check if a regression formula is the ASTM E2848 formula.
+
+    Whitespace is ignored, so 'power ~ poa + I(poa*poa) + ...' matches.
+
+    Parameters
+    ----------
+    fml : str
+        Regression formula in the patsy format used by statsmodels.
+
+    Returns
+    -------
+    bool
+    """
+    return _strip_whitespace(fml) == _strip_whitespace(ASTM_FORMULA)
+
+
+def astm_design_matrix(df):
+    """
+    Create the design matrix of the ASTM E2848 regression.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Must contain the columns 'poa', 't_amb', and 'w_vel'.
+
+    Returns
+    -------
+    numpy array
+        Array with a row for each row of `df` and the columns poa, poa * poa,
+        poa * t_amb, and poa * w_vel.
+    """
+    poa = df['poa'].to_numpy(dtype=float)
+    t_amb = df['t_amb'].to_numpy(dtype=float)
+    w_vel = df['w_vel'].to_numpy(dtype=float)
+    return np.column_stack([poa, poa * poa, poa * t_amb, poa * w_vel])
+
+
+class OlsResults(object):
+    """
+    Lightweight results of an ordinary least squares fit.
+
+    Provides the subset of the statsmodels regression results attributes used
+    by captest. Returned by `fit_astm`, `fit_astm_batch`, and
+    `OlsAccumulator.results`.
+
+    Attributes
+    ----------
+    params : Series
+        Fitted coefficients indexed by the statsmodels parameter names.
+    bse : Series
+        Standard errors of the coefficients.
+    tvalues : Series
+        t statistics of the coefficients.
+    pvalues : Series
+        Two-sided p values of the coefficients.
+    resid : Series or None
+        Residuals indexed like the rows of the data used in the fit. None when
+        fit by `OlsAccumulator`, which does not keep the data.
+    fittedvalues : Series or None
+        Fitted values indexed like the rows of the data used in the fit. None
+        when fit by `OlsAccumulator`.
+    scale : float
+        Residual variance, the sum of squared residuals divided by `df_resid`.
+    nobs : int
+        Number of observations.
+    df_resid : int
+        Residual degrees of freedom.
+    fml : str
+        The regression formula.
+    design_info : patsy DesignInfo or None
+        Design of the fitted data used to build the design matrix of new data
+        for formulas other than the ASTM formula. Not kept when the results are
+        pickled.
+    """
+
+    def __init__(self, params, bse, resid, fittedvalues, scale, df_resid,
+                 nobs=None, names=None, fml=ASTM_FORMULA,
+                 design_info=None):  # noqa: D107
+        if names is None:
+            names = ASTM_PARAM_NAMES
+        self.params = pd.Series(params, index=names)
+        self.bse = pd.Series(bse, index=names)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.tvalues = self.params / self.bse
+        self.pvalues = pd.Series(
+            2 * stats.t.sf(np.abs(self.tvalues.values), df_resid),
+            index=names,
+        )
+        self.resid = resid
+        self.fittedvalues = fittedvalues
+        self.scale = scale
+        self.nobs = resid.shape[0] if nobs is None else nobs
+        self.df_resid = df_resid
+        self.fml = fml
+        self.design_info = design_info
+
+    def __repr__(self):  # noqa: D105
+        return '<OlsResults nobs={}>'.format(self.nobs)
+
+    def __getstate__(self):  # noqa: D105
+        # patsy does not support pickling a DesignInfo
+        state = self.__dict__.copy()
+        state['design_info'] = None
+        return state
+
+    def predict(self, exog):
+        """
+        Predict the response for the values of the variables in `exog`.
+
+        Parameters
+        ----------
+        exog : DataFrame or dict
+            Values of the variables of the regression formula, for the ASTM
+            formula 'poa', 't_amb', and 'w_vel'.
+
+        Returns
+        -------
+        Series
+        """
+        exog = pd.DataFrame(exog)
+        return pd.Series(design_matrix(self, exog) @ self.params.values,
+                         index=exog.index)
+
+    def summary(self):
+        """Return a DataFrame of the coefficients and their statistics."""
+        return pd.DataFrame({
+            'coef': self.params,
+            'std err': self.bse,
+            't': self.tvalues,
+            'P>|t|': self.pvalues,
+        })
+
+
+def design_matrix(results, exog):
+    """
+    Create the design matrix of a fitted regression for new data.
+
+    Parameters
+    ----------
+    results : OlsResults or statsmodels regression results
+        Results of a regression fit from a formula.
+    exog : DataFrame or dict
+        Values of the variables of the regression formula.
+
+    Returns
+    -------
+    numpy array
+        Array with a row for each row of `exog` and a column for each
+        coefficient of `results`.
+    """
+    if isinstance(results, OlsResults):
+        if is_astm_formula(results.fml):
+            return astm_design_matrix(pd.DataFrame(exog))
+        if results.design_info is None:
+            return np.asarray(patsy.dmatrix(_rhs_desc(results.fml), exog))
+        design_info = results.design_info
+    else:
+        design_info = results.model.data.design_info
+    (X,) = patsy.build_design_matrices([design_info], exog)
+    return np.asarray(X)
+
+
+def _prepare(df):
+    """Drop rows missing any regression variable, like statsmodels."""
+    return df[ASTM_VARIABLES].dropna()
+
+
+def _solve_normal_equations(XtX, Xty, solvable):
+    """
+    Solve a stack of normal equations.
+
+    The columns are scaled so the poa squared term does not dominate before
+    inverting X'X. Systems that are not `solvable` or that have a column of
+    zeros are left as NaN.
+
+    Parameters
+    ----------
+    XtX : numpy array
+        Array of shape (groups, params, params) of the X'X of each group.
+    Xty : numpy array
+        Array of shape (groups, params) of the X'y of each group.
+    solvable : numpy array of bool
+        Groups to solve.
+
+    Returns
+    -------
+    tuple
+        The params, the unscaled covariance matrices, and the mask of the
+        groups that were solved.
+    """
+    n_groups, n_params = Xty.shape
+    diag = np.sqrt(np.einsum('gii->gi', XtX))
+    solvable = solvable & (diag > 0).all(axis=1)
+    diag[~solvable] = 1
+    XtX_scaled = XtX / diag[:, :, None] / diag[:, None, :]
+    params = np.full((n_groups, n_params), np.nan)
+    cov_unscaled = np.full((n_groups, n_params, n_params), np.nan)
+    if solvable.any():
+        try:
+            inv = np.linalg.inv(XtX_scaled[solvable])
+        except np.linalg.LinAlgError:
+            # invert each group so only the singular groups are left unsolved
+            inv = np.full((solvable.sum(), n_params, n_params), np.nan)
+            for j, i in enumerate(np.flatnonzero(solvable)):
+                try:
+                    inv[j] = np.linalg.inv(XtX_scaled[i])
+                except np.linalg.LinAlgError:
+                    pass
+            inverted = ~np.isnan(inv).any(axis=(1, 2))
+            solvable[np.flatnonzero(solvable)[~inverted]] = False
+            inv = inv[inverted]
+        inv = inv / diag[solvable][:, :, None] / diag[solvable][:, None, :]
+        cov_unscaled[solvable] = inv
+        params[solvable] = np.einsum('gij,gj->gi', inv, Xty[solvable])
+    return params, cov_unscaled, solvable
+
+
+def fit_astm_batch(groups):
+    """
+    Fit the ASTM E2848 regression to each group of data at once.
+
+    The design matrix is built once for all the rows of all the groups. The
+    normal equations of every group are then solved in a single batched call,
+    rather than parsing the formula and fitting a statsmodels model for each
+    group. The coefficients typically match `statsmodels.formula.api.ols` to a
+    relative tolerance of about 1e-10. Solving the normal equations squares the
+    condition number of the design matrix, so the error grows for data where
+    the terms are nearly collinear, like a narrow range of irradiance.
+
+    Rows with missing values in any of the regression variables are dropped.
+    Groups that cannot be solved this way, for example groups with fewer rows
+    than coefficients or a singular X'X, are solved one at a time with a least
+    squares solver. The other groups are still solved in the batch. Groups
+    without rows have NaN coefficients, scale, and standard errors.
+
+    Parameters
+    ----------
+    groups : DataFrameGroupBy or iterable of (key, DataFrame) tuples
+        The data for each group. The DataFrames must contain the columns
+        'power', 'poa', 't_amb', and 'w_vel'.
+
+    Returns
+    -------
+    Series
+        `OlsResults` for each group indexed by the group keys.
+    """
+    keys = []
+    dfs = []
+    for key, df in groups:
+        keys.append(key)
+        dfs.append(_prepare(df))
+    if len(dfs) == 0:
+        return pd.Series([], dtype=object)
+
+    sizes = np.array([df.shape[0] for df in dfs])
+    all_rows = pd.concat(dfs)
+    X = astm_design_matrix(all_rows)
+    y = all_rows['power'].to_numpy(dtype=float)
+    codes = np.repeat(np.arange(len(dfs)), sizes)
+    n_params = X.shape[1]
+
+    # sum the outer products of the rows of each group to get X'X and X'y
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    nonempty = sizes > 0
+    XtX = np.zeros((len(dfs), n_params, n_params))
+    Xty = np.zeros((len(dfs), n_params))
+    if nonempty.any():
+        starts = bounds[:-1][nonempty]
+        XtX[nonempty] = np.add.reduceat(
+            X[:, :, None] * X[:, None, :], starts, axis=0
+        )
+        Xty[nonempty] = np.add.reduceat(X * y[:, None], starts, axis=0)
+
+    solvable = sizes > n_params
+    params, cov_unscaled, solvable = _solve_normal_equations(XtX, Xty, solvable)
+
+    # groups without rows, e.g. an empty bin of a Grouper, are left as NaN
+    for i in np.flatnonzero(~solvable & nonempty):
+        rows = codes == i
+        params[i] = np.linalg.lstsq(X[rows], y[rows], rcond=None)[0]
+        cov_unscaled[i] = np.linalg.pinv(XtX[i])
+
+    fitted = np.einsum('ij,ij->i', X, params[codes])
+    resid = y - fitted
+    ssr = np.bincount(codes, weights=resid ** 2, minlength=len(dfs))
+    ranks = np.array([
+        np.linalg.matrix_rank(XtX[i]) if not solvable[i] else n_params
+        for i in range(len(dfs))
+    ])
+    df_resid = sizes - ranks
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = ssr / df_resid
+        bse = np.sqrt(scale[:, None] * np.einsum('gii->gi', cov_unscaled))
+
+    results = []
+    for i, df in enumerate(dfs):
+        group_rows = slice(bounds[i], bounds[i + 1])
+        results.append(OlsResults(
+            params[i],
+            bse[i],
+            pd.Series(resid[group_rows], index=df.index),
+            pd.Series(fitted[group_rows], index=df.index),
+            scale[i],
+            df_resid[i],
+        ))
+    if isinstance(keys[0], tuple):
+        index = pd.MultiIndex.from_tuples(keys)
+    else:
+        index = pd.Index(keys)
+    return pd.Series(results, index=index, dtype=object)
+
+
+def fit_astm(df):
+    """
+    Fit the ASTM E2848 regression to a DataFrame.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Must contain the columns 'power', 'poa', 't_amb', and 'w_vel'.
+
+    Returns
+    -------
+    OlsResults
+    """
+    return fit_astm_batch([(0, df)]).iloc[0]
+
+
+def check_engine(engine, fml):
+    """
+    Return the engine to use to fit `fml`.
+
+    Warns and returns 'statsmodels' if `engine` is 'numpy' and `fml` is not
+    the ASTM E2848 formula.
+    """
+    if engine not in ['statsmodels', 'numpy']:
+        raise ValueError("engine must be 'statsmodels' or 'numpy'.")
+    if engine == 'numpy' and not is_astm_formula(fml):
+        warnings.warn(
+            "The numpy engine only fits the ASTM E2848 formula. Using "
+            "statsmodels to fit {}.".format(fml)
+        )
+        return 'statsmodels'
+    return engine
+
+
+def _window_sums(day_sums, days):
+    """Sum `day_sums` over the `days` days ending on each day."""
+    padding = np.zeros((days - 1,) + day_sums.shape[1:], dtype=day_sums.dtype)
+    padded = np.concatenate([padding, day_sums])
+    return np.lib.stride_tricks.sliding_window_view(
+        padded, days, axis=0
+    ).sum(axis=-1)
+
+
+def rolling_fit(df, fml=ASTM_FORMULA, days=None, rc=None):
+    """
+    Fit a regression to the window of data ending on each day.
+
+    The outer products of the rows of the design matrix and the products of
+    the rows and the response are summed once for each day. The X'X and X'y of
+    each window are the sums of the days in the window, so the cost of fitting
+    every window is close to the cost of one fit. The coefficients are solved
+    from the normal equations like `fit_astm_batch`, so they match fitting each
+    window with `statsmodels.formula.api.ols` to a relative tolerance of about
+    1e-10 for typical capacity test data, rather than to machine precision.
+
+    Rows with missing values in any of the variables of `fml` are dropped.
+    Windows with no more rows than coefficients have NaN coefficients.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Data with a DatetimeIndex and the variables of `fml`.
+    fml : str, default ASTM_FORMULA
+        Regression formula in the patsy format used by statsmodels.
+    days : int, default None
+        Length of the windows in days. By default, each window starts at the
+        first row of `df`, so each row of the results is the fit of the data
+        up to the end of that day.
+    rc : DataFrame, default None
+        Reporting conditions. If passed the predicted value at the first row of
+        `rc` for each window is returned in the 'capacity' column.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by the last day of each window with a column of the
+        coefficients of each term of `fml`, the 'capacity' column if `rc` is
+        passed, and the 'nobs' column of the number of rows in each window.
+        Days without data are included.
+    """
+    y, X = patsy.dmatrices(fml, df, return_type='dataframe')
+    design_info = X.design_info
+    names = list(X.columns)
+    n_params = len(names)
+    index = X.index
+    X = X.to_numpy(dtype=float)
+    y = y.iloc[:, 0].to_numpy(dtype=float)
+
+    days_index = pd.date_range(
+        df.index[0].normalize(), df.index[-1].normalize(), freq='D'
+    )
+    n_days = days_index.shape[0]
+
+    # sum the rows of each day, then sum the days in each window, rather than
+    # taking differences of cumulative sums of all the rows, which loses
+    # precision when a window is small relative to the rows before it
+    day_starts = index.searchsorted(days_index, side='left')
+    day_nobs = np.diff(np.append(day_starts, X.shape[0]))
+    has_rows = day_nobs > 0
+    day_XtX = np.zeros((n_days, n_params, n_params))
+    day_Xty = np.zeros((n_days, n_params))
+    if has_rows.any():
+        day_XtX[has_rows] = np.add.reduceat(
+            X[:, :, None] * X[:, None, :], day_starts[has_rows], axis=0
+        )
+        day_Xty[has_rows] = np.add.reduceat(
+            X * y[:, None], day_starts[has_rows], axis=0
+        )
+    if days is None:
+        XtX = np.cumsum(day_XtX, axis=0)
+        Xty = np.cumsum(day_Xty, axis=0)
+        nobs = np.cumsum(day_nobs)
+    else:
+        XtX, Xty, nobs = [
+            _window_sums(day_sums, days)
+            for day_sums in [day_XtX, day_Xty, day_nobs]
+        ]
+
+    params, _, _ = _solve_normal_equations(XtX, Xty, nobs > n_params)
+    results = pd.DataFrame(params, index=days_index, columns=names)
+    if rc is not None:
+        (X_rc,) = patsy.build_design_matrices([design_info], rc.iloc[:1])
+        results['capacity'] = params @ np.asarray(X_rc)[0]
+    results['nobs'] = nobs
+    return results
+
+
+def _triangular_factor(A):
+    """
+    Return the square R factor of the QR decomposition of `A`.
+
+    R is padded with rows of zeros when `A` has fewer rows than columns, so
+    factors of any number of rows can be stacked and factored again.
+    """
+    R = np.linalg.qr(A, mode='r')
+    n_cols = A.shape[1]
+    if R.shape[0] < n_cols:
+        R = np.vstack([R, np.zeros((n_cols - R.shape[0], n_cols))])
+    return R
+
+
+class OlsAccumulator(object):
+    """
+    Triangular factor of a regression accumulated from chunks of data.
+
+    Each call to `update` adds the rows of a chunk of data to R, the upper
+    triangular factor of the QR decomposition of the design matrix with the
+    response appended as the last column, so the data does not need to be in
+    memory at once. R'R holds the X'X, X'y, and y'y of all the rows, but, unlike
+    summing those products, R gives the sum of squared residuals without
+    subtracting two large, nearly equal sums, which loses precision when the
+    residuals are small relative to the response. Accumulators updated from
+    different chunks, files, or workers are combined with `+`, which is
+    associative, and `sum` of a list of accumulators is supported. The
+    coefficients, residual variance, standard errors, and p values returned by
+    `results` match fitting all the data with `statsmodels.formula.api.ols`.
+
+    Parameters
+    ----------
+    fml : str, default ASTM_FORMULA
+        Regression formula in the patsy format used by statsmodels.
+
+    Attributes
+    ----------
+    names : list of str or None
+        Names of the coefficients. None until data has been added.
+    R : numpy array or None
+        Upper triangular factor of the design matrix with the response as the
+        last column.
+    XtX : numpy array or None
+        Sum of the outer products of the rows of the design matrix.
+    Xty : numpy array or None
+        Sum of the rows of the design matrix times the response.
+    yty : float
+        Sum of the squared response.
+    nobs : int
+        Number of rows added.
+    design_info : patsy DesignInfo or None
+        Design of the first chunk added, used by `OlsResults.predict` to build
+        the design matrix of new data with the same categorical levels and
+        stateful transforms. Not kept when the accumulator is pickled.
+    """
+
+    def __init__(self, fml=ASTM_FORMULA):  # noqa: D107
+        self.fml = fml
+        self.names = None
+        self.R = None
+        self.nobs = 0
+        self.design_info = None
+
+    def __repr__(self):  # noqa: D105
+        return '<OlsAccumulator nobs={}>'.format(self.nobs)
+
+    def __getstate__(self):  # noqa: D105
+        # patsy does not support pickling a DesignInfo
+        state = self.__dict__.copy()
+        state['design_info'] = None
+        return state
+
+    @property
+    def XtX(self):  # noqa: D102
+        if self.R is None:
+            return None
+        return self.R[:, :-1].T @ self.R[:, :-1]
+
+    @property
+    def Xty(self):  # noqa: D102
+        if self.R is None:
+            return None
+        return self.R[:, :-1].T @ self.R[:, -1]
+
+    @property
+    def yty(self):  # noqa: D102
+        if self.R is None:
+            return 0.0
+        return float(self.R[:, -1] @ self.R[:, -1])
+
+    def _add(self, names, R, nobs, design_info=None):
+        if self.names is None:
+            self.names = list(names)
+            self.R = R
+        elif list(names) != self.names:
+            raise ValueError(
+                'The terms of the regression are different: {} and {}. The '
+                'data of each chunk must have the same categories.'.format(
+                    self.names, list(names))
+            )
+        else:
+            self.R = _triangular_factor(np.vstack([self.R, R]))
+        if self.design_info is None:
+            self.design_info = design_info
+        self.nobs += nobs
+
+    def update(self, df):
+        """
+        Add the rows of `df`.
+
+        Rows with missing values in any of the variables of the formula are
+        dropped.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Data with the variables of the formula.
+
+        Returns
+        -------
+        OlsAccumulator
+            This accumulator.
+        """
+        y, X = patsy.dmatrices(self.fml, df, return_type='dataframe')
+        names = X.columns
+        design_info = X.design_info
+        X = X.to_numpy(dtype=float)
+        y = y.iloc[:, 0].to_numpy(dtype=float)
+        if X.shape[0] == 0:
+            return self
+        R = _triangular_factor(np.column_stack([X, y]))
+        self._add(names, R, X.shape[0], design_info=design_info)
+        return self
+
+    def __add__(self, other):  # noqa: D105
+        if not isinstance(other, OlsAccumulator):
+            return NotImplemented
+        if other.fml != self.fml:
+            raise ValueError('Cannot combine accumulators of different formulas.')
+        combined = OlsAccumulator(self.fml)
+        for acc in [self, other]:
+            if acc.names is not None:
+                combined._add(acc.names, acc.R, acc.nobs, acc.design_info)
+        return combined
+
+    def __radd__(self, other):  # noqa: D105
+        # allows sum(accumulators), which starts from 0
+        if isinstance(other, int) and other == 0:
+            return self + OlsAccumulator(self.fml)
+        return NotImplemented
+
+    def results(self):
+        """
+        Solve the regression from the accumulated triangular factor.
+
+        Returns
+        -------
+        OlsResults
+            The results do not include the residuals or fitted values.
+        """
+        if self.names is None:
+            raise ValueError('No data has been added to the accumulator.')
+        n_params = len(self.names)
+        R_X = self.R[:n_params, :n_params]
+        rank = np.linalg.matrix_rank(R_X)
+        if self.nobs > n_params and rank == n_params:
+            R_inv = np.linalg.inv(R_X)
+            cov_unscaled = R_inv @ R_inv.T
+            params = R_inv @ self.R[:n_params, -1]
+        else:
+            XtX = self.XtX
+            cov_unscaled = np.linalg.pinv(XtX)
+            params = cov_unscaled @ self.Xty
+        # R'R is [X y]'[X y], so the residuals y - Xb have the same norm as
+        # R [b, -1]
+        ssr = float(np.sum((self.R @ np.append(params, -1)) ** 2))
+        df_resid = self.nobs - rank
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = ssr / df_resid
+            bse = np.sqrt(scale * np.diag(cov_unscaled))
+        return OlsResults(
+            params, bse, None, None, scale, df_resid,
+            nobs=self.nobs, names=self.names, fml=self.fml,
+            design_info=self.design_info,
+        )
@@ -1,8 +1,155 @@
+import importlib
+import importlib.util
 import json
+import os
+from pathlib import Path
+import warnings
 import yaml
 import numpy as np
 import pandas as pd
-from scipy import stats
+
+
+class LazyImport(object):
+    """
+    Stand in for a module or an object from a module that is imported on first use.
+
+    Accessing an attribute, calling, or indexing the stand in imports the module
+    and passes the operation on to the module or object.
+
+    Parameters
+    ----------
+    module_name : str
+        Name of the module to import, e.g. 'bokeh.plotting'.
+    attr : str, default None
+        Name of an object in the module to stand in for, e.g. 'figure'. By
+        default stands in for the module.
+    on_import : function, default None
+        Called with the module after it is imported for the first time.
+    """
+
+    def __init__(self, module_name, attr=None, on_import=None):  # noqa: D107
+        self.__dict__['_module_name'] = module_name
+        self.__dict__['_attr'] = attr
+        self.__dict__['_on_import'] = on_import
+        self.__dict__['_obj'] = None
+
+    def _load(self):
+        """Import the module and return the module or object."""
+        if self.__dict__['_obj'] is None:
+            module = importlib.import_module(self._module_name)
+            if self._on_import is not None:
+                self._on_import(module)
+            if self._attr is None:
+                obj = module
+            else:
+                obj = getattr(module, self._attr)
+            self.__dict__['_obj'] = obj
+        return self.__dict__['_obj']
+
+    def __getattr__(self, name):  # noqa: D105
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):  # noqa: D102
+        return self._load()(*args, **kwargs)
+
+    def __getitem__(self, key):  # noqa: D105
+        return self._load()[key]
+
+    def __repr__(self):  # noqa: D105
+        name = self._module_name
+        if self._attr is not None:
+            name = name + '.' + self._attr
+        return '<LazyImport of {}>'.format(name)
+
+
+def lazy_import(module_name, attr=None, on_import=None, lazy=True):
+    """
+    Import a module or an object from a module now or on first use.
+
+    Parameters
+    ----------
+    module_name : str
+        Name of the module to import.
+    attr : str, default None
+        Name of an object in the module to return instead of the module.
+    on_import : function, default None
+        Called with the module after it is imported.
+    lazy : bool, default True
+        If True, return a `LazyImport` that imports the module on first use. If
+        False, import the module now and return the module or object.
+
+    Returns
+    -------
+    module, object, or LazyImport
+    """
+    proxy = LazyImport(module_name, attr=attr, on_import=on_import)
+    if lazy:
+        return proxy
+    return proxy._load()
+
+
+# Set the CAPTEST_HEADLESS environment variable to 1 before importing captest to
+# import the plotting, dashboard, clear sky, outlier, statsmodels, and scipy
+# dependencies the first time they are used rather than when captest is
+# imported. This makes importing captest much faster for scripts and batch jobs
+# that do not plot.
+HEADLESS = os.environ.get('CAPTEST_HEADLESS', '').lower() in ['1', 'true', 'yes']
+
+stats = lazy_import('scipy.stats', lazy=HEADLESS)
+
+
+parquet_spec = importlib.util.find_spec('pyarrow')
+if parquet_spec is None:
+    parquet_spec = importlib.util.find_spec('fastparquet')
+
+
+def read_parquet_cache(path):
+    """
+    Read a DataFrame cached as parquet.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the parquet file.
+
+    Returns
+    -------
+    DataFrame or None
+        None if the file is not in the cache.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def write_parquet_cache(path, df, description='data'):
+    """
+    Cache a DataFrame as parquet, creating the cache directory if needed.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the parquet file.
+    df : DataFrame
+        Data to cache.
+    description : str, default 'data'
+        Description of the data used in the warning issued if the data cannot
+        be written.
+
+    Returns
+    -------
+    bool
+        False if the data could not be written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        df.to_parquet(path)
+    except Exception as exc:
+        warnings.warn('Unable to cache the {}: {!r}'.format(description, exc))
+        return False
+    return True
 
 
 def read_json(path):
@@ -136,3 +283,51 @@ def generate_irr_distribution(
         else:
             irr_values.append(next_val)
     return irr_values
+
+
+def decimate_minmax(values, n_bins):
+    """
+    Find the positions of the minimum and maximum of each bin of rows.
+
+    The rows are split into `n_bins` bins of consecutive rows of equal size and
+    the positions of the minimum and maximum value in each bin are returned for
+    each column. Plotting only these rows preserves the peaks and troughs of a
+    series, which a plot of every nth row does not.
+
+    Parameters
+    ----------
+    values : numpy array
+        One or two dimensional array of values.
+    n_bins : int
+        Number of bins. Two rows are returned for each bin. Fewer bins are used
+        if there are fewer rows than `n_bins`.
+
+    Returns
+    -------
+    numpy array
+        Integer positions of the rows to keep, sorted within each column.
+        Shape is (2 * n_bins,) for one dimensional `values` and
+        (2 * n_bins, number of columns) for two dimensional `values`. Bins where
+        all the values are missing return the position of the first row of the
+        bin, so gaps in the data remain gaps.
+    """
+    values = np.asarray(values, dtype=float)
+    one_dim = values.ndim == 1
+    if one_dim:
+        values = values[:, None]
+    n_rows, n_cols = values.shape
+    bin_size = max(int(np.ceil(n_rows / n_bins)), 1)
+    n_bins = int(np.ceil(n_rows / bin_size))
+    padded = np.full((n_bins * bin_size, n_cols), np.nan)
+    padded[:n_rows] = values
+    binned = padded.reshape(n_bins, bin_size, n_cols)
+    isnan = np.isnan(binned)
+    arg_min = np.where(isnan, np.inf, binned).argmin(axis=1)
+    arg_max = np.where(isnan, -np.inf, binned).argmax(axis=1)
+    bin_starts = (np.arange(n_bins) * bin_size)[:, None]
+    positions = np.sort(np.stack([arg_min, arg_max], axis=1), axis=1)
+    positions = (positions + bin_starts[:, None, :]).reshape(2 * n_bins, n_cols)
+    positions = np.minimum(positions, n_rows - 1)
+    if one_dim:
+        return positions[:, 0]
+    return positions
@@ -3,6 +3,7 @@ import os
 import copy
 import collections
 import unittest
+from unittest import mock
 import pytest
 import pytz
 import numpy as np
@@ -10,12 +11,14 @@ import pandas as pd
 import statsmodels.formula.api as smf
 import json
 import warnings
+import holoviews as hv
 
 import pvlib
 
 from captest import capdata as pvc
 from captest import util
 from captest import columngroups as cg
+from captest import regression
 from captest import io
 from captest import(
     load_pvsyst,
@@ -254,6 +257,36 @@ class TestTopLevelFuncs(unittest.TestCase):
         less_than = all(cnts_after_flt < cnts_before_flt)
         self.assertTrue(less_than, 'Points were not removed for each group.')
 
+    def test_filter_grps_matches_filter_irr(self):
+        pvsyst = load_pvsyst(path='./tests/data/pvsyst_example_HourlyRes_2.CSV')
+        pvsyst.set_regression_cols(
+            power='real_pwr__', poa='irr_poa_', t_amb='temp_amb_', w_vel='wind__')
+        pvsyst.filter_irr(200, 800)
+        pvsyst.rep_cond(freq='MS')
+        grps = pvsyst.data_filtered.groupby(pd.Grouper(freq='MS', label='left'))
+        poa_col = pvsyst.column_groups[pvsyst.regression_cols['poa']][0]
+
+        grps_flt = pvc.filter_grps(grps, pvsyst.rc, poa_col, 0.8, 1.2, 'MS')
+
+        for grp_name, grp_df in grps:
+            expected = pvc.filter_irr(
+                grp_df, poa_col, 0.8, 1.2, ref_val=pvsyst.rc.loc[grp_name, 'poa'])
+            pd.testing.assert_frame_equal(grps_flt.get_group(grp_name), expected)
+
+    def test_filter_grps_missing_rc(self):
+        df = pd.DataFrame(
+            {'poa': [500, 600, 700, 500, 600, 700]},
+            index=pd.to_datetime([
+                '2021-01-01', '2021-01-02', '2021-01-03',
+                '2021-02-01', '2021-02-02', '2021-02-03']),
+        )
+        rcs = pd.DataFrame({'poa': [600]}, index=pd.to_datetime(['2021-01-01']))
+        grps = df.groupby(pd.Grouper(freq='MS'))
+
+        grps_flt = pvc.filter_grps(grps, rcs, 'poa', 0.9, 1.1, 'MS')
+
+        self.assertEqual(list(grps_flt.obj['poa']), [600])
+
     def test_perc_difference(self):
         result = pvc.perc_difference(9, 10)
         self.assertAlmostEqual(result, 0.105263158)
@@ -296,6 +329,28 @@ class TestTopLevelFuncs(unittest.TestCase):
         self.assertEqual(ix.shape[0], 7,
                          'Filter should have droppe three rows.')
 
+    def test_perc_difference_array(self):
+        x = np.array([9, 10, 10, 0, -2, -9, np.nan])
+        y = np.array([10, 9, 10, 0, 2, -10, 10])
+        result = pvc.perc_difference_array(x, y)
+        expected = [pvc.perc_difference(a, b) for a, b in zip(x, y)]
+        np.testing.assert_allclose(result, expected)
+
+    def test_sensor_filter_matches_row_apply(self):
+        rng = np.random.default_rng(5)
+        df = pd.DataFrame(
+            rng.normal(800, 30, size=(200, 4)), columns=['a', 'b', 'c', 'd']
+        )
+        df.iloc[0:5, :] = 0
+        df.iloc[5, 0:2] = [-3, 3]
+        df.iloc[6, 0] = np.nan
+        df.iloc[7, :] = -800
+        bool_ser = df.apply(
+            pvc.check_all_perc_diff_comb, perc_diff=0.05, axis=1
+        )
+        ix = pvc.sensor_filter(df, 0.05)
+        assert ix.equals(df[bool_ser].index)
+
     def test_sensor_filter_one_col(self):
         rng = np.zeros(10)
         df = pd.DataFrame({'a':rng})
@@ -650,6 +705,35 @@ class TestIrrRcBalanced():
         assert isinstance(rc_tool.poa_flt, pd.DataFrame)
         assert np.isnan(rc_tool.irr_rc)
 
+    def test_counts_match_series_between(self, pvsyst):
+        """Check the sorted array counts match counting with Series.between."""
+        jun = pvsyst.data.loc['06/1990']
+        jun = jun.loc[jun['GlobInc'] > 400, :].copy()
+        jun.iloc[::25, jun.columns.get_loc('GlobInc')] = np.nan
+        rc_tool = pvc.ReportingIrradiance(jun, 'GlobInc', percent_band=20)
+        rc_tool.min_ref_irradiance = 500
+        rc_tool.max_ref_irradiance = 800
+        rc_tool.get_rep_irr()
+        irr = rc_tool.poa_flt.index.to_series()
+        below_count = [
+            irr.between(ref * 0.8, ref).sum() for ref in irr
+        ]
+        above_count = [
+            irr.between(ref, ref * 1.2).sum() for ref in irr
+        ]
+        assert (rc_tool.poa_flt['below_count'].values == below_count).all()
+        assert (rc_tool.poa_flt['above_count'].values == above_count).all()
+
+
+class TestCountBetween():
+    def test_count_between(self):
+        values = np.array([5, 1, 3, np.nan, 3, 10])
+        lows = np.array([0, 3, 4, np.nan, 11, 6])
+        highs = np.array([10, 3, 2, 10, 12, 10])
+        counts = pvc.count_between(values, lows, highs)
+        assert counts.tolist() == [5, 2, 0, 0, 0, 1]
+
+
 class TestCapDataCopy():
     def test_copy_of_pre_agg_attributes(self, meas):
         pre_agg_cols = copy.copy(meas.data.columns)
@@ -668,6 +752,118 @@ class TestCapDataCopy():
         assert meas_copy.pre_agg_trans == meas.pre_agg_trans
         assert meas_copy.pre_agg_reg_trans == meas.pre_agg_reg_trans
 
+    def test_drop_cols_does_not_change_original(self, meas):
+        meas_copy = meas.copy()
+        meas_copy.drop_cols(['met1_poa_refcell'])
+        assert 'met1_poa_refcell' in meas.column_groups['irr_poa_ref_cell']
+        assert 'met1_poa_refcell' not in meas_copy.column_groups['irr_poa_ref_cell']
+
+
+class TestColumnGroupsAttribute():
+    def test_dict_converted(self):
+        cd = pvc.CapData('cd')
+        assert isinstance(cd.column_groups, cg.ColumnGroups)
+        cd.column_groups = {'irr': ['poa1', 'poa2']}
+        assert isinstance(cd.column_groups, cg.ColumnGroups)
+        assert cd.column_groups.groups_of('poa2') == ['irr']
+
+    def test_drop_cols(self, meas):
+        meas.drop_cols(['met1_poa_refcell', 'met2_poa_refcell'])
+        assert meas.column_groups['irr_poa_ref_cell'] == []
+        assert 'met1_poa_refcell' not in meas.data.columns
+        assert meas.column_groups.groups_of('met1_poa_refcell') == []
+
+
+class TestFilterMode():
+    def run_filters(self, cd):
+        cd.agg_sensors()
+        cd.filter_irr(200, 900)
+        cd.filter_time(start='10/9/1990', end='10/12/1990')
+        cd.filter_days(['10/10/1990'], drop=True)
+        cd.filter_sensors(perc_diff={'irr_poa_pyran': 0.05})
+        cd.filter_missing()
+        cd.filter_power(500_000, columns='power_inv')
+        cd.filter_custom(pd.DataFrame.between_time, '9:00', '15:00')
+
+    def test_mask_matches_copy(self, meas):
+        meas_mask = meas.copy()
+        meas_mask.filter_mode = 'mask'
+        meas_mask.reset_filter()
+        self.run_filters(meas)
+        self.run_filters(meas_mask)
+        assert meas_mask._filter_mask is not None
+        assert meas_mask._data_filtered is None
+        pd.testing.assert_frame_equal(meas_mask.data_filtered, meas.data_filtered)
+        pd.testing.assert_frame_equal(meas_mask.get_summary(), meas.get_summary())
+        pd.testing.assert_frame_equal(
+            meas_mask.get_reg_cols(), meas.get_reg_cols()
+        )
+
+    def test_modified_frame_is_stored(self, meas):
+        meas_mask = meas.copy()
+        meas_mask.filter_mode = 'mask'
+        meas_mask.reset_filter()
+        meas_mask.filter_custom(pd.DataFrame.fillna, 0)
+        assert meas_mask._filter_mask is None
+        assert meas_mask.data_filtered.isna().sum().sum() == 0
+        meas_mask.filter_irr(200, 900, col_name='met1_poa_pyranometer')
+        assert (meas_mask.data_filtered['met1_poa_pyranometer'] >= 200).all()
+        meas_mask.reset_filter()
+        assert meas_mask._filter_mask.all()
+
+    def test_copy_keeps_mask(self, meas):
+        meas_mask = meas.copy()
+        meas_mask.filter_mode = 'mask'
+        meas_mask.reset_filter()
+        meas_mask.filter_irr(200, 900, col_name='met1_poa_pyranometer')
+        meas_copy = meas_mask.copy()
+        assert meas_copy.filter_mode == 'mask'
+        assert meas_copy._filter_mask is not meas_mask._filter_mask
+        pd.testing.assert_frame_equal(
+            meas_copy.data_filtered, meas_mask.data_filtered
+        )
+
+    def test_invalid_filter_mode(self):
+        with pytest.raises(ValueError):
+            pvc.CapData('meas', filter_mode='view')
+
+    @pytest.fixture
+    def dup_index(self):
+        ix = pd.DatetimeIndex(
+            ['2023-01-01 12:00', '2023-01-01 12:00', '2023-01-01 12:15',
+             '2023-01-01 12:30', '2023-01-01 12:30']
+        )
+        cd = pvc.CapData('dup')
+        cd.data = pd.DataFrame({
+            'poa': [400, 100, 600, 800, np.nan],
+            'power': [300, 80, 450, 600, 610],
+        }, index=ix)
+        cd.column_groups = {'irr_poa': ['poa'], 'real_pwr': ['power']}
+        cd.regression_cols = {'power': 'power', 'poa': 'poa'}
+        return cd
+
+    @pytest.mark.parametrize('filter_mode', ['copy', 'mask'])
+    def test_duplicate_index(self, dup_index, filter_mode):
+        dup_index.filter_mode = filter_mode
+        dup_index.reset_filter()
+        dup_index.filter_irr(200, 900, col_name='poa')
+        assert dup_index.data_filtered['poa'].tolist() == [400, 600, 800]
+        dup_index.reset_filter()
+        dup_index.filter_missing()
+        assert dup_index.data_filtered.shape[0] == 4
+        assert dup_index.data_filtered['power'].tolist() == [300, 80, 450, 600]
+        dup_index.filter_time(start='2023-01-01 12:00', end='2023-01-01 12:20')
+        assert dup_index.data_filtered['power'].tolist() == [300, 80, 450]
+
+    @pytest.mark.parametrize('filter_mode', ['copy', 'mask'])
+    def test_bool_rows_wrong_length(self, dup_index, filter_mode):
+        dup_index.filter_mode = filter_mode
+        dup_index.reset_filter()
+        with pytest.raises(ValueError):
+            dup_index._apply_filter(np.array([True, False]))
+        assert dup_index.data_filtered.shape[0] == 5
+
+
 class TestCapDataMethodsSim():
     """Test for top level irr_rc_balanced function."""
     def test_copy(self, pvsyst):
@@ -789,6 +985,19 @@ class Test_pvlib_loc_sys(unittest.TestCase):
                               'Did not return instance of\
                                pvlib SingleAxisTracker')
 
+    def test_pvlib_system_reads_sam_once(self):
+        pvc._sam_parameters.cache_clear()
+        with mock.patch.object(
+            pvc, 'retrieve_sam', wraps=pvc.retrieve_sam
+        ) as retrieve_sam:
+            sys_1 = pvc.pvlib_system({'surface_tilt': 20, 'surface_azimuth': 180})
+            sys_2 = pvc.pvlib_system({'surface_tilt': 30, 'surface_azimuth': 180})
+        self.assertEqual(retrieve_sam.call_count, 2)
+        pd.testing.assert_series_equal(
+            sys_1.module_parameters, sys_2.module_parameters
+        )
+        self.assertIsNot(sys_1.module_parameters, sys_2.module_parameters)
+
 
 # possible assertions for method returning ghi
         # self.assertIsInstance(ghi,
@@ -1040,6 +1249,87 @@ class Test_csky():
         # assumes typical orientation is used to calculate the poa irradiance
         assert csky_ghi_poa.index.tz == meas.data.index.tz
 
+    def test_csky_cache_dir(self, meas, location_and_system, tmp_path, mocker):
+        kwargs = dict(
+            loc=location_and_system['location'],
+            sys=location_and_system['system'],
+            concat=False,
+            cache_dir=tmp_path,
+        )
+        csky_modeled = pvc.csky(meas.data, **kwargs)
+        assert len(list(tmp_path.glob('csky_*.parquet'))) == 1
+        model_csky = mocker.spy(pvc, '_model_csky')
+        csky_cached = pvc.csky(meas.data, **kwargs)
+        assert model_csky.call_count == 0
+        pd.testing.assert_frame_equal(csky_cached, csky_modeled, check_freq=False)
+        # a different output option is not read from the cache
+        pvc.csky(meas.data, output='all', **kwargs)
+        assert model_csky.call_count == 1
+
+    def test_csky_coarse_freq(self, meas, location_and_system):
+        kwargs = dict(
+            loc=location_and_system['location'],
+            sys=location_and_system['system'],
+            concat=False,
+            output='all',
+        )
+        csky_full = pvc.csky(meas.data, **kwargs)
+        csky_coarse = pvc.csky(meas.data, coarse_freq='15min', **kwargs)
+        assert csky_coarse.index.equals(csky_full.index)
+        assert csky_coarse.columns.equals(csky_full.columns)
+        error = (csky_coarse - csky_full).abs().max()
+        assert error['ghi'] < 3.4
+        assert error['poa_global'] < 30
+        # points on the coarse grid are not interpolated
+        on_grid = csky_full.index.minute % 15 == 0
+        pd.testing.assert_frame_equal(
+            csky_coarse[on_grid], csky_full[on_grid], check_freq=False
+        )
+
+    def test_csky_coarse_freq_dst_spring(self, meas, location_and_system):
+        data = meas.data.loc['10/9/1990']
+        data.index = pd.date_range('3/12/23', periods=(60 / 5) * 24, freq='5min')
+        csky_coarse = pvc.csky(
+            data,
+            loc=location_and_system['location'],
+            sys=location_and_system['system'],
+            concat=False,
+            coarse_freq='15min',
+        )
+        assert csky_coarse.index.isna().sum() == 12
+        assert csky_coarse.loc[csky_coarse.index.isna()].isna().all().all()
+        assert csky_coarse.loc['3/12/23 12:30', 'ghi_mod_csky'] > 0
+
+    def test_csky_cache_key(self, meas, location_and_system):
+        loc = location_and_system['location']
+        sys = location_and_system['system']
+        times = pvc.get_tz_index(meas.data, loc)
+        key = pvc.csky_cache_key(times, loc, sys)
+        assert key == pvc.csky_cache_key(times, loc, dict(sys))
+        assert key != pvc.csky_cache_key(times[:-1], loc, sys)
+        assert key != pvc.csky_cache_key(times, loc, sys, output='all')
+        assert key != pvc.csky_cache_key(times, loc, dict(sys, surface_tilt=30))
+
+    def test_csky_cache_key_pvlib_version_and_parameters(
+        self, meas, location_and_system, mocker
+    ):
+        loc = location_and_system['location']
+        sys = location_and_system['system']
+        times = pvc.get_tz_index(meas.data, loc)
+        key = pvc.csky_cache_key(times, loc, sys)
+        mocker.patch('pvlib.__version__', '0.0.1')
+        version_key = pvc.csky_cache_key(times, loc, sys)
+        assert version_key != key
+        module = pvc._sam_parameters('SandiaMod').copy()
+        module['Vintage'] = 'changed'
+        mocker.patch.object(
+            pvc, '_sam_parameters',
+            lambda name: module if name == 'SandiaMod' else pvc.retrieve_sam(
+                name).iloc[:, 0],
+        )
+        assert pvc.csky_cache_key(times, loc, sys) not in [key, version_key]
+
+
 """
 Change csky to two functions for creating pvlib location and system objects.
 Separate function calling location and system to calculate POA
@@ -1315,6 +1605,14 @@ class TestPredictCapacities():
         assert isinstance(pred_caps, pd.core.frame.DataFrame)
         assert pred_caps.shape[0] == 4
 
+    def test_numpy_engine(self, pvsyst_irr_filter):
+        pvsyst_irr_filter.rep_cond(freq='MS')
+        expected = pvsyst_irr_filter.predict_capacities(percent_filter=20)
+        pred_caps = pvsyst_irr_filter.predict_capacities(
+            percent_filter=20, engine='numpy'
+        )
+        pd.testing.assert_frame_equal(pred_caps, expected, rtol=1e-6)
+
 class TestFilterIrr():
     def test_get_poa_col(self, nrel):
         col = nrel._CapData__get_poa_col()
@@ -1691,6 +1989,81 @@ class TestCapTestCpResultsSingleCoeff(unittest.TestCase):
                               'Returned value is not a tuple')
 
 
+def sweep_steps(low, high):
+    """Steps for the run_sweep tests, module level so it can be pickled."""
+    sim_steps = [
+        (pvc.CapData.filter_irr, (low, high), {}),
+        (pvc.CapData.fit_regression, (), {'summary': False}),
+    ]
+    das_steps = [
+        (pvc.CapData.filter_irr, (low, high), {}),
+        (pvc.CapData.rep_cond, (), {}),
+        (pvc.CapData.fit_regression, (), {'summary': False}),
+    ]
+    return sim_steps, das_steps
+
+
+class TestRunSweep():
+    grid = {'low': [200, 400], 'high': [800, 1000]}
+
+    def expected_cap_ratio(self, sim, das, low, high):
+        sim = sim.copy()
+        das = das.copy()
+        sim_steps, das_steps = sweep_steps(low, high)
+        pvc.run_test(sim, sim_steps)
+        pvc.run_test(das, das_steps)
+        return pvc.captest_results(sim, das, 1000, '+/- 5', print_res=False), das
+
+    def test_matches_run_test(self, pvsyst, capsys):
+        das = pvsyst.copy()
+        das.data['E_Grid'] = das.data['E_Grid'] * 0.98
+        das.reset_filter()
+        results = pvc.run_sweep(pvsyst, das, sweep_steps, self.grid, 1000, '+/- 5')
+        assert capsys.readouterr().out == ''
+        assert results.shape[0] == 4
+        assert list(results.columns) == [
+            'low', 'high', 'cap_ratio', 'sim_pts', 'das_pts',
+            'rc_poa', 'rc_t_amb', 'rc_w_vel',
+        ]
+        for row in results.itertuples():
+            cap_ratio, das_run = self.expected_cap_ratio(
+                pvsyst, das, row.low, row.high
+            )
+            assert row.cap_ratio == pytest.approx(cap_ratio)
+            assert row.das_pts == das_run.data_filtered.shape[0]
+            assert row.rc_poa == pytest.approx(das_run.rc['poa'][0])
+        # data is shared and not modified, filters are not applied to the inputs
+        assert pvsyst._data_filtered.shape[0] == pvsyst.data.shape[0]
+        assert len(das.summary) == 0
+
+    def test_process_pool(self, pvsyst):
+        das = pvsyst.copy()
+        serial = pvc.run_sweep(pvsyst, das, sweep_steps, self.grid, 1000, '+/- 5')
+        parallel = pvc.run_sweep(
+            pvsyst, das, sweep_steps, self.grid, 1000, '+/- 5', workers=2
+        )
+        pd.testing.assert_frame_equal(parallel, serial)
+
+    def test_list_of_params_and_failures(self, pvsyst):
+        das = pvsyst.copy()
+        grid = [{'low': 200, 'high': 800}, {'low': 2000, 'high': 3000}]
+        with pytest.warns(UserWarning, match='Failed to run'):
+            results = pvc.run_sweep(pvsyst, das, sweep_steps, grid, 1000, '+/- 5')
+        assert results.shape[0] == 2
+        assert not np.isnan(results.loc[0, 'cap_ratio'])
+        assert np.isnan(results.loc[1, 'cap_ratio'])
+
+    def test_interrupt_clears_copies(self, pvsyst):
+        def interrupt_steps(low, high):
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            pvc.run_sweep(
+                pvsyst, pvsyst.copy(), interrupt_steps, self.grid, 1000, '+/- 5'
+            )
+        assert pvc._sweep_base == {}
+
+
 class TestCapTestCpResultsMultCoeffKwVsW(unittest.TestCase):
     """
     Setup and test to check automatic adjustment for kW vs W.
@@ -1746,6 +2119,40 @@ class TestCapTestCpResultsMultCoeffKwVsW(unittest.TestCase):
         self.assertAlmostEqual(cp_rat, cp_rat_test_val, 6,
                                'captest_results did not return expected value.')
 
+class TestCalcCaptestResultsUnits():
+    """Check the 1000x unit adjustment is decided and warned about once."""
+    def cap_data(self, params, bse):
+        cd = pvc.CapData('cd')
+        cd.regression_results = regression.OlsResults(
+            params, bse, pd.Series(np.zeros(100)), None, 1.0, 96
+        )
+        return cd
+
+    def test_kw_vs_w_warns_once(self):
+        sim = self.cap_data([1000, 0, 0, 0], [1, 1, 1, 1])
+        das = self.cap_data([1, 0.001, 0, 0], [0.01, 1, 1, 1])
+        das.rc = pd.DataFrame({'poa': [1], 't_amb': [0], 'w_vel': [0]})
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            results = pvc.calc_captest_results(sim, das, 100, '+/- 5')
+        assert len([w for w in caught if 'multiplied by 1000' in str(w.message)]) == 1
+        assert results.cap_ratio == pytest.approx(1.001)
+        assert results.cap_ratio_check_pvalues == pytest.approx(1)
+
+    def test_small_ratio_only_after_checking_pvalues(self):
+        # the poa coefficient of das has a high p value, so setting it to zero
+        # makes the ratio small, but the units are the same
+        sim = self.cap_data([1, 0, 0, 0], [0.01, 1, 1, 1])
+        das = self.cap_data([1, 0.001, 0, 0], [10, 0.0001, 1, 1])
+        das.rc = pd.DataFrame({'poa': [1], 't_amb': [0], 'w_vel': [0]})
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            results = pvc.calc_captest_results(sim, das, 100, '+/- 5')
+            cap_ratio = pvc.captest_results(sim, das, 100, '+/- 5', print_res=False)
+        assert cap_ratio == pytest.approx(1.001)
+        assert results.cap_ratio_check_pvalues == pytest.approx(0.001)
+
+
 class TestCapTestCpResultsMultCoeff(unittest.TestCase):
     """
     Test captest_results function using a regression formula with multiple coef.
@@ -1815,6 +2222,39 @@ class TestCapTestCpResultsMultCoeff(unittest.TestCase):
         self.assertEqual(cp_rat, cp_rat_pval_check,
                          'captest_results did not return expected value.')
 
+    def test_calc_captest_results(self):
+        sim_params = self.sim.regression_results.params.copy()
+        results = pvc.calc_captest_results(self.sim, self.meas, 100, '+/- 5',
+                                           pval=1e-15)
+        self.assertIsInstance(results, pvc.CapTestResults)
+        self.assertEqual(results.rc_source, 'das')
+        self.assertAlmostEqual(
+            results.cap_ratio,
+            pvc.captest_results(self.sim, self.meas, 100, '+/- 5',
+                                print_res=False),
+            places=12)
+        self.assertAlmostEqual(
+            results.cap_ratio_check_pvalues,
+            pvc.captest_results(self.sim, self.meas, 100, '+/- 5',
+                                check_pvalues=True, pval=1e-15,
+                                print_res=False),
+            places=12)
+        self.assertAlmostEqual(results.capacity, 100 * results.cap_ratio)
+        self.assertEqual(results.bounds, '95.0, 105.0')
+        self.assertFalse(results.passed)
+        self.assertEqual(
+            list(results.params.columns),
+            ['das_pvals', 'sim_pvals', 'das_params', 'sim_params'])
+        # the regression results are not modified
+        pd.testing.assert_series_equal(
+            self.sim.regression_results.params, sim_params)
+
+    def test_calc_captest_results_does_not_copy(self):
+        with mock.patch.object(pvc.CapData, 'copy') as cd_copy:
+            results = pvc.calc_captest_results(self.sim, self.meas, 100, '+/- 5')
+        cd_copy.assert_not_called()
+        self.assertIs(results.rc, self.meas.rc)
+
     @pytest.fixture(autouse=True)
     def _pass_fixtures(self, capsys):
         self.capsys = capsys
@@ -1890,6 +2330,90 @@ class TestGetFilteringTable:
             flt0_removed_ix.union(flt1_removed_ix).union(flt2_removed_ix)
         )
 
+class TestFilterHistory:
+    """Check the compact record of the rows kept and removed by each filter."""
+
+    @pytest.mark.parametrize('filter_mode', ['copy', 'mask'])
+    def test_kept_and_removed(self, nrel, filter_mode):
+        nrel.filter_mode = filter_mode
+        nrel.reset_filter()
+        kept = [nrel.data.index]
+        for low, high in [(200, 900), (400, 800), (500, 600)]:
+            nrel.filter_irr(low, high)
+            kept.append(nrel.data_filtered.index)
+        assert nrel.filter_history.names == [
+            'filter_irr', 'filter_irr-1', 'filter_irr-2'
+        ]
+        for i, step in enumerate(nrel.kept):
+            assert step['index'].equals(kept[i + 1])
+        for i, step in enumerate(nrel.removed):
+            assert step['index'].equals(kept[i].difference(kept[i + 1]))
+
+    def test_stored_as_bits(self, nrel):
+        nrel.filter_irr(200, 900)
+        nrel.filter_irr(400, 800)
+        n_bytes = int(np.ceil(nrel.data.shape[0] / 8))
+        for rows in nrel.filter_history._after:
+            assert isinstance(rows, np.ndarray)
+            assert rows.shape == (n_bytes, )
+        assert nrel.filter_history._before[1] is None
+
+    def test_stores_index_when_not_rows_of_data(self, pvsyst):
+        pvsyst.filter_time(start='12/15/90', end='1/15/91', wrap_year=True)
+        pvsyst.filter_irr(200, 800, col_name='GlobInc')
+        assert isinstance(pvsyst.filter_history._after[0], pd.Index)
+        assert pvsyst.kept[1]['index'].equals(pvsyst.data_filtered.index)
+        assert pvsyst.removed[1]['index'].shape[0] > 0
+
+    def test_scatter_and_timeseries_filters(self, meas):
+        meas.data.index.name = 'Timestamp'
+        meas.data['index'] = meas.data.index.strftime('%m/%d/%Y %H %M')
+        meas.agg_sensors()
+        meas.filter_irr(200, 900)
+        meas.filter_missing()
+        meas.filter_time(start='10/9/1990', end='10/11/1990')
+        assert isinstance(meas.scatter_filters(), hv.Overlay)
+        assert isinstance(meas.timeseries_filters(), hv.Overlay)
+
+    def test_removed_by(self, nrel):
+        nrel.filter_irr(200, 900)
+        nrel.filter_irr(400, 800)
+        steps = nrel.filter_history.removed_by(nrel.data.index)
+        history = nrel.filter_history
+        assert (steps == 0).sum() == history.removed_mask(0, nrel.data.index).sum()
+        assert (steps == 1).sum() == history.removed_mask(1, nrel.data.index).sum()
+        assert nrel.data.index[steps == -1].equals(nrel.data_filtered.index)
+
+    def test_rasterize_filters(self, meas):
+        pytest.importorskip('datashader')
+        meas.agg_sensors()
+        meas.filter_irr(200, 900)
+        meas.filter_time(start='10/9/1990', end='10/11/1990')
+        for plot in [
+            meas.scatter_filters(rasterize=True),
+            meas.timeseries_filters(rasterize=True),
+        ]:
+            assert isinstance(plot, hv.DynamicMap)
+            hv.render(plot)
+
+    def test_rasterize_filters_without_datashader(self, meas, monkeypatch):
+        monkeypatch.setattr(pvc, 'ds_spec', None)
+        meas.data.index.name = 'Timestamp'
+        meas.data['index'] = meas.data.index.strftime('%m/%d/%Y %H %M')
+        meas.agg_sensors()
+        meas.filter_irr(200, 900)
+        meas.filter_time(start='10/9/1990', end='10/11/1990')
+        with pytest.warns(UserWarning, match='datashader'):
+            assert isinstance(meas.scatter_filters(rasterize=True), hv.Overlay)
+
+    def test_copy(self, nrel):
+        nrel.filter_irr(200, 900)
+        nrel_copy = nrel.copy()
+        nrel_copy.filter_irr(400, 800)
+        assert len(nrel.filter_history) == 1
+        assert len(nrel_copy.filter_history) == 2
+
+
 @pytest.fixture
 def pts_summary(meas):
     pts_summary = pvc.PointsSummary(meas)
@@ -1962,6 +2486,69 @@ class TestPointsSummary():
         assert results_str == captured.out
 
 
+class TestFindTestWindows():
+    poa = 'met1_poa_pyranometer'
+
+    def test_points_match_filter_time(self, meas):
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        windows = meas.find_test_windows(2).sort_index()
+        assert windows.shape[0] == 4
+        for start, row in windows.iterrows():
+            meas_copy = meas.copy()
+            meas_copy.filter_time(start=start, days=2)
+            assert row['points'] == meas_copy._filtered_index().shape[0]
+        assert (windows['end'] - windows.index == pd.Timedelta(days=2)).all()
+
+    def test_balance_matches_rep_irr_counts(self, meas):
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        windows = meas.find_test_windows(2, irr_rc=500, col_name=self.poa)
+        window = windows.loc['1990-10-11']
+        poa = meas.data_filtered.loc['1990-10-11':'1990-10-12', self.poa]
+        below = poa.between(400, 500).sum()
+        above = poa.between(500, 600).sum()
+        assert window['band_points'] == below + above
+        assert window['perc_below'] == pytest.approx(below / (below + above) * 100)
+
+    def test_rank_earliest_compliant_first(self, meas):
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        windows = meas.find_test_windows(2, pts_required=220)
+        assert windows.index[0] == pd.Timestamp('1990-10-09')
+        assert list(windows['compliant']) == [True, True, False, False]
+        # non compliant windows are ranked by the number of points
+        assert list(windows.index[2:]) == [
+            pd.Timestamp('1990-10-11'), pd.Timestamp('1990-10-12')
+        ]
+        assert list(windows['rank']) == [1, 2, 3, 4]
+
+    def test_unbalanced_window_not_compliant(self, meas):
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        windows = meas.find_test_windows(
+            2, pts_required=1, irr_rc=500, col_name=self.poa,
+            min_percent_below=0, max_percent_above=1,
+        )
+        assert not windows['balanced'].any()
+        assert not windows['compliant'].any()
+
+    def test_default_pts_required(self, meas):
+        windows = meas.find_test_windows(1)
+        assert meas.pts_required == 150
+        assert windows['meets_pts'].all()
+        assert windows['band_points'].isna().all()
+
+    def test_mask_mode(self, meas):
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        expected = meas.find_test_windows(2)
+        meas.filter_mode = 'mask'
+        meas.reset_filter()
+        meas.filter_irr(200, 2000, col_name=self.poa)
+        pd.testing.assert_frame_equal(meas.find_test_windows(2), expected)
+
+    def test_warns_after_filter_time(self, meas):
+        meas.filter_time(start='10/9/1990', days=2)
+        with pytest.warns(UserWarning, match='filter_time has been applied'):
+            meas.find_test_windows(2)
+
+
 class TestSetPlotsAttributes():
     """Test assigning colors to each column using the keys of the column_grouping."""
     def test_real_power_group_colors(self, meas):
@@ -1981,6 +2568,41 @@ class TestSetPlotsAttributes():
         assert meas.col_colors['inv1_power'] == '#d60000'
 
 
+class TestPlot():
+    """Test the bokeh plot of each group of columns."""
+    def test_decimate(self, meas, mocker):
+        mocker.patch.object(pvc, 'show', lambda grid: grid)
+        meas.set_plot_attributes()
+        grid = meas.plot(
+            subset=['irr_poa_ref_cell'],
+            merge_grps=[],
+            use_abrev_name=False,
+            decimate=True,
+            width=100,
+        )
+        renderers = grid.children[0][0].renderers
+        assert len(renderers) == 2
+        for renderer in renderers:
+            col = renderer.glyph.y
+            source = renderer.data_source.data
+            assert len(source['Timestamp']) == 192
+            assert max(source[col]) == meas.data[col].max()
+            assert min(source[col]) == meas.data[col].min()
+
+    def test_decimate_auto(self, meas, mocker):
+        mocker.patch.object(pvc, 'show', lambda grid: grid)
+        meas.set_plot_attributes()
+        plot_kwargs = dict(
+            subset=['irr_poa_ref_cell'], merge_grps=[], use_abrev_name=False
+        )
+        grid = meas.plot(**plot_kwargs)
+        source = grid.children[0][0].renderers[0].data_source
+        assert len(source.data['Timestamp']) == meas.data.shape[0]
+        grid = meas.plot(decimate_threshold=1000, **plot_kwargs)
+        source = grid.children[0][0].renderers[0].data_source
+        assert len(source.data['Timestamp']) < meas.data.shape[0]
+
+
 class TestDataColumnsToExcel():
     """
     Test the `data_columns_to_excel` method of the `CapData` class.
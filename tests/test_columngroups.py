@@ -1,4 +1,6 @@
 import os
+import copy
+import pickle
 import collections
 import unittest
 import pytest
@@ -7,6 +9,7 @@ import numpy as np
 import pandas as pd
 
 from captest import columngroups as cg
+from captest import capdata as pvc
 
 col_groups = {
     'irr_poa':[
@@ -93,3 +96,144 @@ class TestColumnGroups():
             '    pcs002_inv04_power_kw\n'
         )
         assert output_str == pretty_col_groups
+
+    def test_groups_of(self, col_grp):
+        assert col_grp.groups_of('sel 735 mw') == ['realpwr_mtr']
+        assert col_grp.groups_of('not a column') == []
+        col_grp['mtr_and_poa'] = ['sel 735 mw', 'poa pyran met 1']
+        assert col_grp.groups_of('sel 735 mw') == ['realpwr_mtr', 'mtr_and_poa']
+        del col_grp['mtr_and_poa']
+        assert col_grp.groups_of('sel 735 mw') == ['realpwr_mtr']
+        assert not hasattr(col_grp, 'mtr_and_poa')
+
+    def test_groups_of_after_changing_list(self, col_grp):
+        col_grp.groups_of('sel 735 mw')
+        col_grp['irr_poa'].append('sel 735 mw')
+        assert col_grp.groups_of('sel 735 mw') == ['irr_poa', 'realpwr_mtr']
+        col_grp['irr_poa'].remove('sel 735 mw')
+        assert col_grp.groups_of('sel 735 mw') == ['realpwr_mtr']
+
+    def test_drop_columns(self, col_grp):
+        col_grp.drop_columns(['poa pyran met 1', 'sel 735 mw', 'not a column'])
+        assert col_grp['irr_poa'] == ['poa pyran met 2', 'poa pyran met 3']
+        assert col_grp.irr_poa == ['poa pyran met 2', 'poa pyran met 3']
+        assert col_grp['realpwr_mtr'] == []
+        assert col_grp.groups_of('poa pyran met 1') == []
+
+    def test_rename_columns(self, col_grp):
+        col_grp.rename_columns({'sel 735 mw': 'meter', 'ghi pyran met 1': 'ghi 1'})
+        assert col_grp['realpwr_mtr'] == ['meter']
+        assert col_grp['irr_ghi'][0] == 'ghi 1'
+        assert col_grp.groups_of('meter') == ['realpwr_mtr']
+        assert col_grp.groups_of('sel 735 mw') == []
+
+    def test_resolve(self, col_grp):
+        assert col_grp.resolve(['realpwr_mtr', 'irr_poa', 'other']) == [
+            'sel 735 mw',
+            'poa pyran met 1',
+            'poa pyran met 2',
+            'poa pyran met 3',
+            'other',
+        ]
+        assert col_grp.resolve(['realpwr_mtr', 'other'], columns=['a']) == [
+            'sel 735 mw'
+        ]
+
+    def test_copy_is_independent(self, col_grp):
+        for col_grp_copy in [
+            copy.copy(col_grp), copy.deepcopy(col_grp), col_grp.copy()
+        ]:
+            col_grp_copy.drop_columns(['sel 735 mw'])
+            col_grp_copy['irr_poa'].append('new')
+            assert col_grp['realpwr_mtr'] == ['sel 735 mw']
+            assert col_grp.groups_of('new') == []
+            assert col_grp_copy.groups_of('new') == ['irr_poa']
+
+    def test_pickle(self, col_grp):
+        col_grp_unpickled = pickle.loads(pickle.dumps(col_grp))
+        assert col_grp_unpickled == col_grp
+        col_grp_unpickled['irr_poa'].append('new')
+        assert col_grp_unpickled.groups_of('new') == ['irr_poa']
+
+
+    def test_non_identifier_keys(self):
+        col_grp = cg.ColumnGroups({1: ['a'], 'irr poa': ['b']})
+        assert col_grp[1] == ['a']
+        assert col_grp['irr poa'] == ['b']
+        assert col_grp.groups_of('a') == [1]
+        assert '1' in str(col_grp)
+        del col_grp[1]
+        assert 1 not in col_grp
+
+    @pytest.mark.parametrize('key', ['data', 'copy', 'column_index', 'resolve'])
+    def test_keys_matching_attributes(self, key):
+        col_grp = cg.ColumnGroups({key: ['a'], 'x': ['b']})
+        assert col_grp[key] == ['a']
+        assert col_grp.x == ['b']
+        assert col_grp.groups_of('a') == [key]
+        assert col_grp.resolve([key, 'x']) == ['a', 'b']
+        assert isinstance(col_grp.copy(), cg.ColumnGroups)
+        del col_grp[key]
+        assert dict(col_grp) == {'x': ['b']}
+
+    def test_capdata_dict_keys(self):
+        cd = pvc.CapData('cd')
+        cd.column_groups = {'data': ['a'], 2: ['b']}
+        assert cd.column_groups.groups_of('b') == [2]
+        assert cd.column_groups['data'] == ['a']
+
+
+class TestColumnTypes():
+    def test_matches_series_type(self):
+        """Check the regex classifier returns the same types as series_type."""
+        rng = np.random.default_rng(5)
+        words = [
+            search_str
+            for defs in [cg.type_defs, cg.sub_type_defs, cg.irr_sensors_defs]
+            for search_strs in defs.values()
+            for search_str in search_strs
+        ] + ['met', 'kw', '1', 'Avg', '(', '*', '+']
+        names = [
+            ' '.join(rng.choice(words, size=rng.integers(1, 5)))
+            for i in range(500)
+        ]
+        for defs in [cg.type_defs, cg.sub_type_defs, cg.irr_sensors_defs]:
+            expected = [cg.series_type(pd.Series(name=name), defs) for name in names]
+            assert cg.column_types(names, defs) == expected
+
+    def test_no_match(self):
+        assert cg.column_types(['abc', 'xyz'], cg.type_defs) == ['', '']
+
+    def test_empty_type_defs(self):
+        assert cg.column_types(['abc'], {}) == ['']
+
+    def test_empty_search_strings(self):
+        defs = {'a': [], 'b': ['abc'], 'c': []}
+        names = ['abc', 'xyz']
+        expected = [cg.series_type(pd.Series(name=name), defs) for name in names]
+        assert expected == ['b', '']
+        assert cg.column_types(names, defs) == expected
+
+
+class TestGroupColumns():
+    def test_group_columns(self):
+        data = pd.DataFrame(
+            columns=[
+                'met1 poa pyranometer W/m2',
+                'met1 ambient temp',
+                'met2 poa pyranometer W/m2',
+                'meter real power',
+                'inv1 real power',
+                'met1 wind speed',
+            ]
+        )
+        assert dict(cg.group_columns(data)) == {
+            'irr_poa_pyran': [
+                'met1 poa pyranometer W/m2',
+                'met2 poa pyranometer W/m2',
+            ],
+            'temp_amb_': ['met1 ambient temp'],
+            'real_pwr_inv_': ['inv1 real power'],
+            'real_pwr_mtr_': ['meter real power'],
+            'wind__': ['met1 wind speed'],
+        }
@@ -259,6 +259,87 @@ class TestFileReader:
         assert isinstance(loaded_data, pd.DataFrame)
         assert isinstance(loaded_data.index, pd.DatetimeIndex)
 
+    def test_full_file_parsed_once(self, mocker):
+        """Check the full file is read once after sniffing the header."""
+        spy = mocker.spy(io.pd, "read_csv")
+        io.file_reader("./tests/data/example_meas_data_aeheaders.csv")
+        full_file_reads = [
+            call for call in spy.call_args_list if not isinstance(call.args[0], StringIO)
+        ]
+        assert len(full_file_reads) == 1
+
+
+class TestSniffCsv:
+    """Test detection of the encoding, index column, and header rows."""
+
+    def test_ae_headers(self):
+        kwargs = io.sniff_csv(
+            "./tests/data/example_meas_data_aeheaders.csv", index_col=0
+        )
+        assert kwargs["encoding"] == "latin1"
+        assert kwargs["index_col"] == 0
+        assert kwargs["header"] == [0, 1, 2, 3]
+
+    def test_prefix_extended_to_find_data(self):
+        """Check that a prefix that only includes headers is extended."""
+        kwargs = io.sniff_csv(
+            "./tests/data/example_meas_data_aeheaders.csv",
+            sniff_bytes=50,
+            index_col=0,
+        )
+        assert kwargs["header"] == [0, 1, 2, 3]
+
+    def test_prefix_ends_in_quoted_newline(self, tmp_path):
+        """Check that a prefix ending within a quoted field is extended."""
+        csv_path = tmp_path / "quoted_newline.csv"
+        lines = ['Timestamp,"met1\npoa1",met1_poa2'] + [
+            "2022-08-01 00:{:02d},{},{}".format(i, i, i + 20) for i in range(20)
+        ]
+        csv_path.write_text("\n".join(lines) + "\n")
+        for sniff_bytes in [8, 12]:
+            loaded_data = io.file_reader(csv_path, sniff_bytes=sniff_bytes)
+            assert list(loaded_data.columns) == ["met1\npoa1", "met1_poa2"]
+            assert loaded_data.shape == (20, 2)
+
+    def test_date_format_warning_not_repeated(self, tmp_path):
+        """Check that parsing the prefix does not repeat date format warnings."""
+        csv_path = tmp_path / "ampm_dates.csv"
+        index = pd.date_range(start="8/13/22", periods=5, freq="1h")
+        pd.DataFrame(
+            {"met1_poa1": np.arange(0, 5)}, index=index.strftime("%m/%d/%y %I:%M %p")
+        ).to_csv(csv_path)
+        with warnings.catch_warnings(record=True) as record:
+            warnings.simplefilter("always")
+            io.file_reader(csv_path)
+        format_warnings = [
+            w for w in record if "Could not infer format" in str(w.message)
+        ]
+        assert len(format_warnings) == 1
+
+    def test_latin1_encoding(self, tmp_path):
+        csv_path = tmp_path / "latin1.csv"
+        pd.DataFrame(
+            {"met1_poa1_W/m²": np.arange(0, 20)},
+            index=pd.date_range(start="8/1/22", periods=20, freq="1min"),
+        ).to_csv(csv_path, encoding="latin1")
+        kwargs = io.sniff_csv(csv_path, index_col=0, parse_dates=True)
+        assert kwargs["encoding"] == "latin1"
+        loaded_data = io.file_reader(csv_path)
+        assert loaded_data.columns[0] == "met1_poa1_W/m²"
+
+    def test_int_index_first_column(self, tmp_path):
+        csv_path = tmp_path / "first_col_ints_data.csv"
+        pd.DataFrame(
+            {
+                "datetime": pd.date_range(start="8/1/22", periods=20, freq="1min"),
+                "met1_poa1": np.arange(0, 20),
+            },
+        ).to_csv(csv_path)
+        kwargs = io.sniff_csv(csv_path, index_col=0, parse_dates=True)
+        assert kwargs["index_col"] == 1
+        assert "header" not in kwargs
+
+
 class TestLoadPVsyst:
     def test_load_pvsyst(self):
         pvsyst = load_pvsyst("./tests/data/pvsyst_example_HourlyRes_2.CSV")
@@ -584,6 +665,146 @@ class TestDataLoader:
             pd.date_range(start="8/3/22", periods=20, freq="1min")
         )
 
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_load_parallel_matches_serial(self, tmp_path, executor):
+        """
+        Test that loading files in a pool returns the same data in the same order
+        as loading them one at a time.
+        """
+        for i in [3, 1, 2]:
+            csv_path = tmp_path / ("file_" + str(i) + ".csv")
+            pd.DataFrame(
+                {
+                    "met1_poa1": np.arange(0, 20),
+                    "met1_poa2": np.arange(20, 40),
+                },
+                index=pd.date_range(
+                    start="8/" + str(i) + "/22", periods=20, freq="1min"
+                ),
+            ).drop(index=pd.Timestamp("8/" + str(i) + "/22 00:05")).to_csv(csv_path)
+        dl_serial = DataLoader(tmp_path)
+        dl_serial.load()
+        dl_parallel = DataLoader(tmp_path)
+        dl_parallel.load(workers=2, executor=executor)
+        assert list(dl_parallel.loaded_files.keys()) == ["file_1", "file_2", "file_3"]
+        assert dl_parallel.file_frequencies == dl_serial.file_frequencies
+        assert dl_parallel.common_freq == dl_serial.common_freq
+        assert dl_parallel.failed_files == {}
+        assert dl_parallel.file_missing_intervals == dl_serial.file_missing_intervals
+        assert dl_parallel.file_missing_intervals == {
+            "file_1": 1, "file_2": 1, "file_3": 1
+        }
+        pd.testing.assert_frame_equal(dl_parallel.data, dl_serial.data)
+
+    def test_load_parallel_reports_failed_files(self, tmp_path):
+        """Test that a file that cannot be loaded is skipped with a warning."""
+        for i in range(1, 3, 1):
+            csv_path = tmp_path / ("file_" + str(i) + ".csv")
+            pd.DataFrame(
+                {"met1_poa1": np.arange(0, 20)},
+                index=pd.date_range(
+                    start="8/" + str(i) + "/22", periods=20, freq="1min"
+                ),
+            ).to_csv(csv_path)
+        with open(tmp_path / "file_3.csv", "w") as f:
+            f.write("a,b\n")
+        dl = DataLoader(tmp_path)
+        with pytest.warns(UserWarning, match="Failed to load .*file_3.csv"):
+            dl.load(workers=2)
+        assert list(dl.failed_files.keys()) == [tmp_path / "file_3.csv"]
+        assert list(dl.loaded_files.keys()) == ["file_1", "file_2"]
+        assert dl.data.shape == (40, 2)
+
+    def test_load_new_files(self, tmp_path):
+        """
+        Test that only files added after the first load are read and appended to
+        the reindexed data.
+        """
+        def write_day(day):
+            pd.DataFrame(
+                {
+                    "met1_poa1": np.arange(0, 20) + day * 100,
+                    "met1_poa2": np.arange(20, 40) + day * 100,
+                },
+                index=pd.date_range(
+                    start="8/" + str(day) + "/22", periods=20, freq="1min"
+                ),
+            ).to_csv(tmp_path / ("file_" + str(day) + ".csv"))
+
+        for day in [1, 2]:
+            write_day(day)
+        dl = DataLoader(tmp_path)
+        dl.load()
+        dl.sort_data()
+        dl.drop_duplicate_rows()
+        dl.reindex()
+        historical = dl.data.copy()
+        assert dl.ingested_files == [tmp_path / "file_1.csv", tmp_path / "file_2.csv"]
+
+        write_day(3)
+        new_data = dl.load_new_files()
+        assert dl.ingested_files[-1] == tmp_path / "file_3.csv"
+        assert list(dl.loaded_files.keys()) == ["file_1", "file_2", "file_3"]
+        pd.testing.assert_frame_equal(dl.data.loc[historical.index], historical)
+        assert new_data.index[0] == historical.index[-1] + pd.Timedelta("1min")
+        assert dl.data.index[-1] == pd.Timestamp("8/3/22 00:19")
+        assert dl.data.index.freq == "1min"
+
+        full = DataLoader(tmp_path)
+        full.load()
+        full.sort_data()
+        full.drop_duplicate_rows()
+        full.reindex()
+        pd.testing.assert_frame_equal(dl.data, full.data, check_freq=False)
+        assert dl.missing_intervals == full.missing_intervals
+
+        with pytest.warns(UserWarning, match="No new files"):
+            assert dl.load_new_files() is None
+
+    def test_load_new_files_drops_overlapping_rows(self, tmp_path):
+        """Test that rows of new files before the end of the data are not added."""
+        pd.DataFrame(
+            {"met1_poa1": np.arange(0, 20)},
+            index=pd.date_range(start="8/1/22", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_1.csv")
+        dl = DataLoader(tmp_path)
+        dl.load()
+        dl.reindex()
+        pd.DataFrame(
+            {"met1_poa1": np.arange(100, 120)},
+            index=pd.date_range(start="8/1/22 00:10", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_2.csv")
+        with pytest.warns(UserWarning, match="10 rows of the new files"):
+            new_data = dl.load_new_files()
+        assert new_data.shape[0] == 10
+        assert dl.data.shape[0] == 30
+        assert dl.data.loc["8/1/22 00:10", "met1_poa1"] == 10
+
+    def test_load_new_files_drops_off_grid_rows(self, tmp_path):
+        """Test that rows of new files between the intervals of the data are counted."""
+        pd.DataFrame(
+            {"met1_poa1": np.arange(0, 20)},
+            index=pd.date_range(start="8/1/22", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_1.csv")
+        dl = DataLoader(tmp_path)
+        dl.load()
+        dl.reindex()
+        missing_intervals = dl.missing_intervals
+        pd.DataFrame(
+            {"met1_poa1": np.arange(100, 120)},
+            index=pd.date_range(start="8/1/22 00:20", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_2.csv")
+        pd.DataFrame(
+            {"met1_poa1": np.arange(200, 220)},
+            index=pd.date_range(start="8/1/22 01:00:30", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_3.csv")
+        with pytest.warns(UserWarning, match="20 rows of the new files are not on"):
+            new_data = dl.load_new_files()
+        assert new_data.index[-1] == pd.Timestamp("8/1/22 01:19")
+        assert new_data["met1_poa1"].notna().sum() == 20
+        assert dl.missing_intervals == missing_intervals + 40
+        assert dl.data.index.freq == "1min"
+
     def test_load_specific_file_doesnt_exist(self, tmp_path):
         """
         Test load method when `path` attribute is pointing to a file that doesn't exist.
@@ -652,6 +873,17 @@ class TestLoadDataFunction:
         assert "poa_mod_csky" in cd.data.columns
         assert "poa_mod_csky" in cd.data_filtered.columns
 
+    def test_adds_csky_coarse_freq(self, location_and_system):
+        site = {
+            "sys": location_and_system["system"],
+            "loc": location_and_system["location"],
+        }
+        cd = load_data(path="./tests/data/example_measured_data.csv", site=site)
+        site["coarse_freq"] = "15min"
+        cd_coarse = load_data(path="./tests/data/example_measured_data.csv", site=site)
+        error = (cd_coarse.data["ghi_mod_csky"] - cd.data["ghi_mod_csky"]).abs()
+        assert error.max() < 3.4
+
     def test_export_column_group_template(self, meas):
         """
         Test that the column_groups_template kwarg results in an xlsx file saved
@@ -678,6 +910,162 @@ class TestLoadDataFunction:
         assert isinstance(cd.data, pd.DataFrame)
         assert isinstance(cd.data.index, pd.DatetimeIndex)
 
+    def test_filter_mode_mask(self, tmp_path):
+        pd.DataFrame(
+            {
+                "met1_poa1": np.arange(0, 20),
+                "met1_poa2": np.arange(20, 40),
+            },
+            index=pd.date_range(start="8/1/22", periods=20, freq="1min"),
+        ).to_csv(tmp_path / "file_1.csv")
+        cd = load_data(tmp_path, filter_mode="mask")
+        assert cd.filter_mode == "mask"
+        assert cd._data_filtered is None
+        pd.testing.assert_frame_equal(cd.data_filtered, cd.data)
+
+    def test_cache_dir_hit_skips_loading(self, tmp_path, mocker):
+        data_path = tmp_path / "data"
+        data_path.mkdir()
+        for i in range(1, 3, 1):
+            pd.DataFrame(
+                {
+                    "met1_poa1": np.arange(0, 20),
+                    "met1_poa2": np.arange(20, 40),
+                },
+                index=pd.date_range(
+                    start="8/" + str(i) + "/22", periods=20, freq="1min"
+                ),
+            ).to_csv(data_path / ("file_" + str(i) + ".csv"))
+        cache_path = tmp_path / "cache"
+        cd = load_data(data_path, cache_dir=cache_path)
+        assert len(list(cache_path.glob("*.parquet"))) == 1
+        load_spy = mocker.spy(io.DataLoader, "load")
+        reindex_spy = mocker.spy(io.DataLoader, "reindex")
+        cd_cached = load_data(data_path, cache_dir=cache_path)
+        assert load_spy.call_count == 0
+        assert reindex_spy.call_count == 0
+        pd.testing.assert_frame_equal(cd_cached.data, cd.data)
+        assert cd_cached.data.index.freq == cd.data.index.freq
+        assert cd_cached.column_groups == cd.column_groups
+        assert cd_cached.data_loader.freq_str == cd.data_loader.freq_str
+        assert (
+            cd_cached.data_loader.missing_intervals
+            == cd.data_loader.missing_intervals
+        )
+
+    def test_cache_dir_miss_on_changed_file(self, tmp_path, mocker):
+        data_path = tmp_path / "data"
+        data_path.mkdir()
+        csv_path = data_path / "file_1.csv"
+        df = pd.DataFrame(
+            {"met1_poa1": np.arange(0, 20)},
+            index=pd.date_range(start="8/1/22", periods=20, freq="1min"),
+        )
+        df.to_csv(csv_path)
+        load_data(data_path, cache_dir=tmp_path / "cache")
+        df.iloc[0, 0] = 1000
+        df.to_csv(csv_path)
+        os.utime(csv_path, ns=(0, 0))
+        load_spy = mocker.spy(io.DataLoader, "load")
+        cd = load_data(data_path, cache_dir=tmp_path / "cache")
+        assert load_spy.call_count == 1
+        assert cd.data.iloc[0, 0] == 1000
+        assert len(list((tmp_path / "cache").glob("*.parquet"))) == 2
+
+    def test_cache_dir_caches_csky(self, tmp_path, location_and_system, mocker):
+        site = {
+            "sys": location_and_system["system"],
+            "loc": location_and_system["location"],
+        }
+        cd = load_data(
+            path="./tests/data/example_measured_data.csv",
+            site=site,
+            cache_dir=tmp_path,
+        )
+        assert len(list(tmp_path.glob("csky_*.parquet"))) == 1
+        model_csky = mocker.spy(pvc, "_model_csky")
+        cd_cached = load_data(
+            path="./tests/data/example_measured_data.csv",
+            site=site,
+            cache_dir=tmp_path,
+        )
+        assert model_csky.call_count == 0
+        pd.testing.assert_frame_equal(cd_cached.data, cd.data, check_freq=False)
+
+    def test_cache_key_changes_with_kwargs(self, tmp_path):
+        csv_path = tmp_path / "file_1.csv"
+        with open(csv_path, "w") as f:
+            f.write("a,b\n")
+        key = io.load_data_cache_key(tmp_path, sort=True)
+        assert key == io.load_data_cache_key(tmp_path, sort=True)
+        assert key != io.load_data_cache_key(tmp_path, sort=False)
+        assert key != io.load_data_cache_key(tmp_path, extension="txt", sort=True)
+
+    def test_cache_key_changes_with_versions(self, tmp_path, mocker):
+        csv_path = tmp_path / "file_1.csv"
+        with open(csv_path, "w") as f:
+            f.write("a,b\n")
+        key = io.load_data_cache_key(tmp_path)
+        mocker.patch("captest.__version__", "0.0.1")
+        captest_key = io.load_data_cache_key(tmp_path)
+        assert captest_key != key
+        mocker.patch.object(io.pd, "__version__", "0.0.1")
+        assert io.load_data_cache_key(tmp_path) not in [key, captest_key]
+
+
+class TestCapDataLoadNewFiles:
+    """Test appending new files to a CapData object created by `load_data`."""
+
+    def write_day(self, path, day):
+        pd.DataFrame(
+            {
+                "met1_poa1": np.arange(0, 20) + day * 100,
+                "met1_poa2": np.arange(20, 40) + day * 100,
+            },
+            index=pd.date_range(start="8/" + str(day) + "/22", periods=20, freq="1min"),
+        ).to_csv(path / ("file_" + str(day) + ".csv"))
+
+    def test_matches_loading_all_files(self, tmp_path):
+        for day in [1, 2]:
+            self.write_day(tmp_path, day)
+        cd = load_data(tmp_path, filter_mode="mask")
+        cd.filter_custom(pd.DataFrame.head, 5)
+        self.write_day(tmp_path, 3)
+        with pytest.warns(UserWarning, match="filters were reset"):
+            new_data = cd.load_new_files()
+        assert new_data.index[-1] == pd.Timestamp("8/3/22 00:19")
+        full = load_data(tmp_path)
+        pd.testing.assert_frame_equal(cd.data, full.data, check_freq=False)
+        assert cd.data.index.freq == "1min"
+        assert len(cd.filter_history) == 0
+        pd.testing.assert_frame_equal(cd.data_filtered, cd.data)
+        assert cd.column_groups == full.column_groups
+
+    def test_reuses_csky_options(self, tmp_path, location_and_system, mocker):
+        data_path = tmp_path / "data"
+        data_path.mkdir()
+        cache_path = tmp_path / "cache"
+        for day in [1, 2]:
+            self.write_day(data_path, day)
+        site = {
+            "sys": location_and_system["system"],
+            "loc": location_and_system["location"],
+            "coarse_freq": "5min",
+        }
+        cd = load_data(data_path, site=site, cache_dir=cache_path)
+        assert cd.csky_kwargs == {"cache_dir": cache_path, "coarse_freq": "5min"}
+        self.write_day(data_path, 3)
+        model_csky = mocker.spy(pvc, "_model_csky")
+        new_data = cd.load_new_files()
+        assert model_csky.call_args.kwargs["coarse_freq"] == "5min"
+        assert len(list(cache_path.glob("csky_*.parquet"))) == 2
+        assert not new_data["poa_mod_csky"].isna().all()
+        assert cd.copy().csky_kwargs == cd.csky_kwargs
+
+    def test_without_data_loader(self):
+        with pytest.warns(UserWarning, match="created with load_data"):
+            assert pvc.CapData("cd").load_new_files() is None
+
 
 class TestLoadDataMethods(unittest.TestCase):
     """Test for load data methods without setup."""
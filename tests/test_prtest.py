@@ -388,4 +388,143 @@ class TestPrResults:
         assert captured.out == (
                 "The test is FAILING with a measured PR of 78.00, "
                 "which is 2.00 below the expected PR of 80.00\n"
-        )
\ No newline at end of file
+        )
+
+@pytest.fixture
+def pr_year_data():
+    ix = pd.date_range(start="1/1/2021", end="12/31/2022 23:00", freq="H")
+    rng = np.random.default_rng(11)
+    poa = pd.Series(
+        np.clip(1000 * np.sin((ix.hour - 6) / 12 * np.pi), 0, None), index=ix
+    )
+    ac_energy = poa * 0.1 * rng.uniform(0.7, 0.9, size=ix.shape[0])
+    temp_amb = pd.Series(rng.uniform(10, 35, size=ix.shape[0]), index=ix)
+    wind_speed = pd.Series(rng.uniform(0, 5, size=ix.shape[0]), index=ix)
+    return ac_energy, poa, temp_amb, wind_speed
+
+
+class TestPerfRatioByPeriod:
+    def test_matches_perf_ratio(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        monthly = pr.perf_ratio_by_period(
+            ac_energy, 125, poa, freq="M", degradation=0.5, year=2, availability=0.98
+        )
+        assert isinstance(monthly.index, pd.PeriodIndex)
+        assert monthly.shape[0] == 24
+        for period in monthly.index[[0, 5, 23]]:
+            in_period = poa.index.to_period("M") == period
+            expected = pr.perf_ratio(
+                ac_energy[in_period],
+                125,
+                poa[in_period],
+                degradation=0.5,
+                year=2,
+                availability=0.98,
+            )
+            assert monthly.loc[period, "pr"] == pytest.approx(expected.pr)
+            assert monthly.loc[period, "ac_energy"] == pytest.approx(
+                ac_energy[in_period].sum()
+            )
+
+    def test_matches_perf_ratio_temp_corr_nrel(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        daily = pr.perf_ratio_by_period(
+            ac_energy,
+            125,
+            poa,
+            power_temp_coeff=-0.37,
+            temp_amb=temp_amb,
+            wind_speed=wind_speed,
+        )
+        assert daily.shape[0] == 730
+        in_period = poa.index.to_period("D") == daily.index[100]
+        expected = pr.perf_ratio_temp_corr_nrel(
+            ac_energy[in_period],
+            125,
+            poa[in_period],
+            power_temp_coeff=-0.37,
+            temp_amb=temp_amb[in_period],
+            wind_speed=wind_speed[in_period],
+        )
+        assert daily["pr"].iloc[100] == pytest.approx(expected.pr)
+
+    def test_degradation_by_year_of_operation(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        monthly = pr.perf_ratio_by_period(
+            ac_energy, 125, poa, freq="M", degradation=1, start_date="1/1/2021"
+        )
+        assert (monthly.loc["2021", "year"] == 1).all()
+        assert (monthly.loc["2022", "year"] == 2).all()
+        assert monthly.loc["2022-01", "degradation_factor"] == pytest.approx(0.99**2)
+
+    def test_availability_by_timestep_and_period(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        avail = pd.Series(1.0, index=poa.index)
+        avail.loc["2021-03"] = 0.5
+        monthly = pr.perf_ratio_by_period(
+            ac_energy, 125, poa, freq="M", availability=avail
+        )
+        assert monthly.loc["2021-03", "availability"] == pytest.approx(0.5)
+        assert monthly.loc["2021-04", "availability"] == pytest.approx(1)
+        monthly_avail = pd.Series(
+            monthly["availability"].values, index=monthly.index
+        )
+        monthly_2 = pr.perf_ratio_by_period(
+            ac_energy, 125, poa, freq="M", availability=monthly_avail
+        )
+        pd.testing.assert_frame_equal(monthly, monthly_2)
+
+
+class TestPrAccumulator:
+    def test_matches_perf_ratio(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        acc = pr.PrAccumulator(125, freq="M", degradation=0.5, year=2)
+        for chunk in np.array_split(np.arange(poa.shape[0]), 7):
+            acc.update(ac_energy.iloc[chunk], poa.iloc[chunk], availability=0.98)
+        results = acc.results()
+        expected = pr.perf_ratio(
+            ac_energy, 125, poa, degradation=0.5, year=2, availability=0.98
+        )
+        assert isinstance(results, pr.PrResults)
+        assert results.pr == pytest.approx(expected.pr)
+        assert results.timestep == expected.timestep
+        pd.testing.assert_frame_equal(
+            acc.by_period(),
+            pr.perf_ratio_by_period(
+                ac_energy,
+                125,
+                poa,
+                freq="M",
+                degradation=0.5,
+                year=2,
+                availability=0.98,
+            ),
+        )
+
+    def test_no_data(self):
+        acc = pr.PrAccumulator(125)
+        with pytest.raises(ValueError, match="No data"):
+            acc.by_period()
+        with pytest.raises(ValueError, match="No data"):
+            acc.results()
+
+    def test_temp_corr(self, pr_year_data):
+        ac_energy, poa, temp_amb, wind_speed = pr_year_data
+        acc = pr.PrAccumulator(125, power_temp_coeff=-0.37)
+        for chunk in np.array_split(np.arange(poa.shape[0]), 3):
+            acc.update(
+                ac_energy.iloc[chunk],
+                poa.iloc[chunk],
+                temp_amb=temp_amb.iloc[chunk],
+                wind_speed=wind_speed.iloc[chunk],
+            )
+        expected = pr.perf_ratio_temp_corr_nrel(
+            ac_energy,
+            125,
+            poa,
+            power_temp_coeff=-0.37,
+            temp_amb=temp_amb,
+            wind_speed=wind_speed,
+        )
+        assert acc.results().pr == pytest.approx(expected.pr)
+        assert acc.sums.shape[0] == 730
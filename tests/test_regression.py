@@ -0,0 +1,365 @@
+import pickle
+
+import pytest
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+from captest import regression
+from captest import capdata as pvc
+
+
+@pytest.fixture
+def reg_data():
+    rng = np.random.default_rng(7)
+    n = 5000
+    df = pd.DataFrame(
+        {
+            "poa": rng.uniform(100, 1000, n),
+            "t_amb": rng.uniform(0, 35, n),
+            "w_vel": rng.uniform(0, 8, n),
+        },
+        index=pd.date_range(start="1/1/2021", periods=n, freq="15min"),
+    )
+    df["power"] = (
+        5 * df["poa"]
+        - 0.001 * df["poa"] ** 2
+        - 0.01 * df["poa"] * df["t_amb"]
+        + 0.02 * df["poa"] * df["w_vel"]
+        + rng.normal(0, 20, n)
+    )
+    df.iloc[3, 0] = np.nan
+    return df
+
+
+def assert_results_match(results, expected):
+    pd.testing.assert_series_equal(results.params, expected.params, rtol=1e-9)
+    pd.testing.assert_series_equal(results.bse, expected.bse, rtol=1e-9)
+    pd.testing.assert_series_equal(
+        results.pvalues, expected.pvalues, rtol=1e-6, atol=1e-12
+    )
+    pd.testing.assert_series_equal(
+        results.resid, expected.resid, rtol=1e-6, check_names=False
+    )
+    assert results.scale == pytest.approx(expected.scale, rel=1e-9)
+    assert results.nobs == expected.nobs
+
+
+class TestIsAstmFormula:
+    def test_default_formula(self):
+        assert regression.is_astm_formula(regression.ASTM_FORMULA)
+
+    def test_capdata_default_formula(self):
+        assert regression.is_astm_formula(pvc.CapData("meas").regression_formula)
+
+    def test_whitespace_ignored(self):
+        assert regression.is_astm_formula(
+            "power~poa+I(poa*poa)+I(poa*t_amb)+I(poa*w_vel)-1"
+        )
+
+    def test_other_formula(self):
+        assert not regression.is_astm_formula("power ~ poa - 1")
+
+
+class TestFitAstm:
+    def test_matches_statsmodels(self, reg_data):
+        expected = smf.ols(regression.ASTM_FORMULA, data=reg_data).fit()
+        results = regression.fit_astm(reg_data)
+        assert_results_match(results, expected)
+
+    def test_predict(self, reg_data):
+        expected = smf.ols(regression.ASTM_FORMULA, data=reg_data).fit()
+        results = regression.fit_astm(reg_data)
+        rcs = pd.DataFrame({"poa": [600, 800], "t_amb": [20, 25], "w_vel": [2, 3]})
+        pd.testing.assert_series_equal(
+            results.predict(rcs), expected.predict(rcs), rtol=1e-9
+        )
+
+    def test_fit_model_engine(self, reg_data):
+        results = pvc.fit_model(reg_data, engine="numpy")
+        assert isinstance(results, regression.OlsResults)
+
+    def test_fit_model_engine_other_formula(self, reg_data):
+        with pytest.warns(UserWarning, match="only fits the ASTM E2848 formula"):
+            results = pvc.fit_model(reg_data, fml="power ~ poa", engine="numpy")
+        assert not isinstance(results, regression.OlsResults)
+
+    def test_invalid_engine(self, reg_data):
+        with pytest.raises(ValueError):
+            pvc.fit_model(reg_data, engine="scipy")
+
+
+class TestFitAstmBatch:
+    def test_matches_statsmodels(self, reg_data):
+        grps = reg_data.groupby(pd.Grouper(freq="W"))
+        expected = grps.apply(pvc.fit_model)
+        results = regression.fit_astm_batch(grps)
+        assert results.index.equals(expected.index)
+        for result, exp in zip(results, expected):
+            assert_results_match(result, exp)
+
+    def test_group_too_small(self, reg_data):
+        groups = [("a", reg_data.iloc[:100]), ("b", reg_data.iloc[100:103])]
+        results = regression.fit_astm_batch(groups)
+        expected = smf.ols(regression.ASTM_FORMULA, data=reg_data.iloc[:100]).fit()
+        assert_results_match(results["a"], expected)
+        np.testing.assert_allclose(
+            results["b"].params.values,
+            smf.ols(regression.ASTM_FORMULA, data=reg_data.iloc[100:103])
+            .fit()
+            .params.values,
+            rtol=1e-6,
+        )
+
+    def test_singular_group(self, reg_data):
+        singular = reg_data.iloc[100:200].copy()
+        singular["w_vel"] = singular["t_amb"]
+        groups = [("a", reg_data.iloc[:100]), ("b", singular)]
+        XtX = np.stack(
+            [
+                regression.astm_design_matrix(regression._prepare(df)).T
+                @ regression.astm_design_matrix(regression._prepare(df))
+                for _, df in groups
+            ]
+        )
+        with pytest.raises(np.linalg.LinAlgError):
+            np.linalg.inv(XtX[1] / np.outer(*[np.sqrt(np.diag(XtX[1]))] * 2))
+        _, _, solved = regression._solve_normal_equations(
+            XtX, np.ones((2, 4)), np.array([True, True])
+        )
+        assert solved.tolist() == [True, False]
+        results = regression.fit_astm_batch(groups)
+        expected = smf.ols(regression.ASTM_FORMULA, data=reg_data.iloc[:100]).fit()
+        assert_results_match(results["a"], expected)
+        np.testing.assert_allclose(
+            results["b"].fittedvalues.values,
+            smf.ols(regression.ASTM_FORMULA, data=singular).fit().fittedvalues.values,
+            rtol=1e-6,
+        )
+
+    def test_empty_group(self, reg_data):
+        # hourly data for most of a year without any data in February
+        data = reg_data.set_index(
+            pd.date_range(start="1/1/2021", periods=reg_data.shape[0], freq="H")
+        )
+        data = data.loc[data.index.month != 2]
+        grps = data.groupby(pd.Grouper(freq="MS"))
+        results = regression.fit_astm_batch(grps)
+        feb = pd.Timestamp("2021-02-01")
+        assert results[feb].params.isna().all()
+        assert np.isnan(results[feb].scale)
+        assert results[feb].nobs == 0
+        assert results[feb].df_resid == 0
+        jan = smf.ols(regression.ASTM_FORMULA, data=data.loc["2021-01"]).fit()
+        assert_results_match(results[pd.Timestamp("2021-01-01")], jan)
+        rcs = pd.DataFrame(
+            {"poa": 700, "t_amb": 20, "w_vel": 2}, index=range(grps.ngroups)
+        )
+        summary = pvc.pred_summary(grps, rcs, 0.05, engine="numpy")
+        assert np.isnan(summary.loc[feb, "PredCap"])
+        assert not summary["PredCap"].drop(feb).isna().any()
+
+    def test_pred_summary_engine(self, reg_data):
+        grps = reg_data.groupby(pd.Grouper(freq="W"))
+        rcs = pd.DataFrame(
+            {"poa": 700, "t_amb": 20, "w_vel": 2}, index=range(grps.ngroups)
+        )
+        expected = pvc.pred_summary(grps, rcs.copy(), 0.05)
+        results = pvc.pred_summary(grps, rcs.copy(), 0.05, engine="numpy")
+        pd.testing.assert_frame_equal(results, expected, rtol=1e-9)
+
+
+class TestRollingFit:
+    def test_matches_statsmodels(self, reg_data):
+        results = regression.rolling_fit(reg_data, days=7)
+        for day in ["2021-01-07", "2021-01-20", "2021-02-21"]:
+            end = pd.Timestamp(day) + pd.Timedelta(days=1)
+            start = end - pd.Timedelta(days=7)
+            window = reg_data[(reg_data.index >= start) & (reg_data.index < end)]
+            expected = smf.ols(regression.ASTM_FORMULA, data=window).fit()
+            np.testing.assert_allclose(
+                results.loc[day, regression.ASTM_PARAM_NAMES].values.astype(float),
+                expected.params.values,
+                rtol=1e-8,
+            )
+            assert results.loc[day, "nobs"] == expected.nobs
+
+    def test_short_window_after_long_history(self):
+        # a one day window of 1-minute data after months of data in W
+        rng = np.random.default_rng(13)
+        n = 60 * 24 * 120
+        df = pd.DataFrame(
+            {
+                "poa": rng.uniform(400, 1000, n),
+                "t_amb": rng.uniform(20, 35, n),
+                "w_vel": rng.uniform(0, 8, n),
+            },
+            index=pd.date_range(start="1/1/2021", periods=n, freq="min"),
+        )
+        df["power"] = (
+            6000 * df["poa"]
+            - 0.5 * df["poa"] ** 2
+            - 10 * df["poa"] * df["t_amb"]
+            + 2 * df["poa"] * df["w_vel"]
+            + rng.normal(0, 50, n)
+        )
+        results = regression.rolling_fit(df, days=1)
+        day = results.index[-1]
+        expected = smf.ols(regression.ASTM_FORMULA, data=df.loc[day:]).fit()
+        np.testing.assert_allclose(
+            results.loc[day, regression.ASTM_PARAM_NAMES].values.astype(float),
+            expected.params.values,
+            rtol=1e-10,
+        )
+
+    def test_expanding_other_formula_capacity(self, reg_data):
+        fml = "power ~ poa + I(poa * poa)"
+        rc = pd.DataFrame({"poa": [700], "t_amb": [20], "w_vel": [2]})
+        results = regression.rolling_fit(reg_data, fml=fml, rc=rc)
+        expected = smf.ols(fml, data=reg_data.loc[:"2021-01-10"]).fit()
+        row = results.loc["2021-01-10"]
+        np.testing.assert_allclose(
+            row[["Intercept", "poa", "I(poa * poa)"]].values.astype(float),
+            expected.params.values,
+            rtol=1e-8,
+        )
+        assert row["capacity"] == pytest.approx(expected.predict(rc)[0], rel=1e-8)
+        # the row with a missing poa value is dropped
+        assert row["nobs"] == expected.nobs == 10 * 96 - 1
+
+    def test_index_and_too_few_rows(self, reg_data):
+        results = regression.rolling_fit(reg_data.iloc[:100], days=1)
+        assert results.index.equals(
+            pd.date_range("2021-01-01", "2021-01-02", freq="D")
+        )
+        assert results.loc["2021-01-02", "nobs"] == 4
+        assert results.loc["2021-01-02", regression.ASTM_PARAM_NAMES].isna().all()
+
+    def test_capdata_rolling_regression(self, meas):
+        meas.agg_sensors()
+        meas.rep_cond()
+        results = meas.rolling_regression(days=2)
+        day = meas.data.index[-1].normalize()
+        meas.filter_time(start=day - pd.Timedelta(days=1), days=2)
+        meas.fit_regression(summary=False)
+        np.testing.assert_allclose(
+            results.loc[day, regression.ASTM_PARAM_NAMES].values.astype(float),
+            meas.regression_results.params.values,
+            rtol=1e-8,
+        )
+        assert results.loc[day, "capacity"] == pytest.approx(
+            meas.regression_results.predict(meas.rc)[0], rel=1e-8
+        )
+
+
+class TestOlsAccumulator:
+    def test_matches_statsmodels(self, reg_data):
+        acc = regression.OlsAccumulator()
+        for _, chunk in reg_data.groupby(pd.Grouper(freq="W")):
+            acc.update(chunk)
+        results = acc.results()
+        expected = smf.ols(regression.ASTM_FORMULA, data=reg_data).fit()
+        pd.testing.assert_series_equal(results.params, expected.params, rtol=1e-9)
+        pd.testing.assert_series_equal(results.bse, expected.bse, rtol=1e-6)
+        pd.testing.assert_series_equal(
+            results.pvalues, expected.pvalues, rtol=1e-6, atol=1e-12
+        )
+        assert results.scale == pytest.approx(expected.scale, rel=1e-8)
+        assert results.nobs == expected.nobs
+        assert results.df_resid == expected.df_resid
+        assert results.resid is None
+
+    def test_bse_pvalues_realistic_magnitudes(self):
+        # power in W of a 5 MW plant with residuals that are small relative to
+        # the power, so y'y is many orders of magnitude larger than the SSR
+        rng = np.random.default_rng(11)
+        n = 100_000
+        df = pd.DataFrame(
+            {
+                "poa": rng.uniform(400, 1000, n),
+                "t_amb": rng.uniform(20, 35, n),
+                "w_vel": rng.uniform(0, 8, n),
+            }
+        )
+        df["power"] = (
+            6000 * df["poa"]
+            - 0.5 * df["poa"] ** 2
+            - 10 * df["poa"] * df["t_amb"]
+            + 2 * df["poa"] * df["w_vel"]
+            + rng.normal(0, 50, n)
+        )
+        acc = sum(
+            regression.OlsAccumulator().update(chunk)
+            for chunk in np.array_split(df, 20)
+        )
+        results = acc.results()
+        expected = smf.ols(regression.ASTM_FORMULA, data=df).fit()
+        assert results.scale == pytest.approx(expected.scale, rel=1e-6)
+        pd.testing.assert_series_equal(results.bse, expected.bse, rtol=1e-6)
+        pd.testing.assert_series_equal(
+            results.pvalues, expected.pvalues, rtol=1e-6, atol=1e-12
+        )
+
+    def test_combine_associative(self, reg_data):
+        chunks = [reg_data.iloc[:1000], reg_data.iloc[1000:3000], reg_data.iloc[3000:]]
+        a, b, c = [regression.OlsAccumulator().update(chunk) for chunk in chunks]
+        left = ((a + b) + c).results()
+        right = (a + (b + c)).results()
+        pd.testing.assert_series_equal(left.params, right.params, rtol=1e-12)
+        assert sum([a, b, c]).nobs == a.nobs + b.nobs + c.nobs
+        # combining does not modify the accumulators, the row with a missing
+        # value is dropped
+        assert a.nobs == 999
+
+    def test_other_formula_predict(self, reg_data):
+        fml = "power ~ poa + I(poa * poa)"
+        acc = sum(
+            regression.OlsAccumulator(fml).update(chunk)
+            for _, chunk in reg_data.groupby(pd.Grouper(freq="M"))
+        )
+        results = acc.results()
+        expected = smf.ols(fml, data=reg_data).fit()
+        pd.testing.assert_series_equal(results.params, expected.params, rtol=1e-8)
+        rcs = pd.DataFrame({"poa": [600, 800]})
+        pd.testing.assert_series_equal(
+            results.predict(rcs), expected.predict(rcs), rtol=1e-9
+        )
+
+    def test_predict_uses_fitted_design(self, reg_data):
+        reg_data = reg_data.assign(hot=np.where(reg_data["t_amb"] > 20, "y", "n"))
+        fml = "power ~ poa + center(t_amb) + C(hot)"
+        acc = regression.OlsAccumulator(fml).update(reg_data)
+        expected = smf.ols(fml, data=reg_data).fit()
+        # new data with one level of hot and a different mean of t_amb
+        rcs = pd.DataFrame({"poa": [600, 800], "t_amb": [30, 32], "hot": "y"})
+        pd.testing.assert_series_equal(
+            acc.results().predict(rcs), expected.predict(rcs), rtol=1e-9
+        )
+
+    def test_pickle(self, reg_data):
+        acc = regression.OlsAccumulator().update(reg_data)
+        restored = pickle.loads(pickle.dumps(acc))
+        pd.testing.assert_series_equal(restored.results().params, acc.results().params)
+        assert restored.design_info is None
+        pickle.loads(pickle.dumps(acc.results()))
+
+    def test_different_formula(self, reg_data):
+        a = regression.OlsAccumulator().update(reg_data)
+        b = regression.OlsAccumulator("power ~ poa").update(reg_data)
+        with pytest.raises(ValueError):
+            a + b
+
+    def test_empty(self):
+        with pytest.raises(ValueError, match="No data"):
+            regression.OlsAccumulator().results()
+
+    def test_capdata_regression_accumulator(self, meas):
+        meas.agg_sensors()
+        first, second = meas.copy(), meas.copy()
+        first.filter_time(start="10/9/1990", end="10/10/1990 23:55")
+        second.filter_time(start="10/11/1990", end="10/13/1990 23:55")
+        acc = first.regression_accumulator() + second.regression_accumulator()
+        meas.fit_regression(summary=False)
+        pd.testing.assert_series_equal(
+            acc.results().params, meas.regression_results.params, rtol=1e-8
+        )
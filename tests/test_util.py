@@ -1,4 +1,6 @@
 import os
+import sys
+import subprocess
 import collections
 import unittest
 import pytest
@@ -20,6 +22,57 @@ ix_5min = pd.date_range(
     periods=3
 )
 
+class TestLazyImport():
+    def test_import_on_first_use(self):
+        calls = []
+        json_dumps = util.lazy_import(
+            'json', 'dumps', on_import=lambda module: calls.append(module)
+        )
+        assert isinstance(json_dumps, util.LazyImport)
+        assert calls == []
+        assert json_dumps([1]) == '[1]'
+        assert json_dumps([2]) == '[2]'
+        assert len(calls) == 1
+
+    def test_import_now(self):
+        import json
+        assert util.lazy_import('json', lazy=False) is json
+
+    def test_headless_import(self):
+        code = (
+            'import sys\n'
+            'import pandas as pd\n'
+            'import captest\n'
+            'heavy = ["holoviews", "panel", "bokeh", "matplotlib", "sklearn", '
+            '"statsmodels", "pvlib"]\n'
+            'assert not any(m in sys.modules for m in heavy), sys.modules.keys()\n'
+            'df = pd.DataFrame({"power": [1., 2., 3.1, 4., 5.2, 6.], '
+            '"poa": [1., 2., 3., 4., 5., 6.], "t_amb": [1., 3., 2., 4., 1., 2.], '
+            '"w_vel": [2., 1., 1., 3., 1., 2.]})\n'
+            'captest.capdata.fit_model(df)\n'
+            'assert "statsmodels" in sys.modules\n'
+            'assert "holoviews" not in sys.modules\n'
+        )
+        env = dict(os.environ, CAPTEST_HEADLESS='1')
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+
+    def test_datashader_not_imported(self):
+        pytest.importorskip('datashader')
+        code = (
+            'import sys\n'
+            'import captest\n'
+            'assert "datashader" not in sys.modules\n'
+        )
+        env = {k: v for k, v in os.environ.items() if k != 'CAPTEST_HEADLESS'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+
+
 class TestGetCommonTimestep():
     def test_output_type_str(self):
         df = pd.DataFrame({'a':[1, 2, 4]}, index=ix)
@@ -121,3 +174,44 @@ class TestReindexDatetime():
         assert df_reindexed.shape[0] == 10
         assert missing_int == 2
         assert freq == '5min'
+
+
+class TestDecimateMinmax():
+    def test_keeps_min_and_max_of_bins(self):
+        values = np.array([1, 5, 2, 0, 3, 3, np.nan, np.nan, 4.])
+        positions = util.decimate_minmax(values, 3)
+        assert positions.tolist() == [0, 1, 3, 4, 8, 8]
+
+    def test_all_missing_bin(self):
+        values = np.array([1, 2, np.nan, np.nan, 3, 4.])
+        positions = util.decimate_minmax(values, 3)
+        assert positions.tolist() == [0, 1, 2, 2, 4, 5]
+
+    def test_two_dimensional(self):
+        values = np.column_stack([np.arange(10.), -np.arange(10.)])
+        positions = util.decimate_minmax(values, 2)
+        assert positions.shape == (4, 2)
+        assert positions[:, 0].tolist() == [0, 4, 5, 9]
+        assert positions[:, 1].tolist() == [0, 4, 5, 9]
+
+    def test_fewer_rows_than_bins(self):
+        positions = util.decimate_minmax(np.arange(3.), 10)
+        assert positions.tolist() == [0, 0, 1, 1, 2, 2]
+
+
+class TestParquetCache():
+    def test_round_trip(self, tmp_path):
+        df = pd.DataFrame({'a': [1.0, 2.0]}, index=ix[:2])
+        path = tmp_path / 'cache' / 'df.parquet'
+        assert util.read_parquet_cache(path) is None
+        assert util.write_parquet_cache(path, df)
+        pd.testing.assert_frame_equal(
+            util.read_parquet_cache(path), df, check_freq=False
+        )
+
+    def test_write_failure_warns(self, tmp_path, mocker):
+        mocker.patch.object(pd.DataFrame, 'to_parquet', side_effect=OSError)
+        with pytest.warns(UserWarning, match='Unable to cache the test data'):
+            assert not util.write_parquet_cache(
+                tmp_path / 'df.parquet', pd.DataFrame(), description='test data'
+            )